@@ -17,22 +17,31 @@ from src.awards import Awards
 from src.contentgen import ContentGenerator
 from src.query import Query
 from src.plotting import Plotting
+from src.store import LeagueStore
+from src.webdata import WebData
 
 load_dotenv()
 
 
 def main():
+    # Compact _data files
+    web = WebData(compact=True)
+
     q = Query()
+    q.web = web
     q.query_seasons()
     q.save_data()
 
-    a = Awards()
+    # Every stage shares one set of datasets, each read from disk once
+    store = LeagueStore()
+
+    a = Awards(store, web)
     a.run()
 
-    p = Plotting()
+    p = Plotting(store, web)
     p.run()
 
-    c = ContentGenerator()
+    c = ContentGenerator(store, web)
     c.generate_chart_data()
     c.generate_all_manager_pages()
 
@@ -0,0 +1,302 @@
+"""
+awardrules.py
+
+Declarative award definitions, and the engine that evaluates them.
+
+An award rule names a source table, an optional aggregation of a metric
+(e.g. the points of each player, summed per manager and season), the
+contests to decide (e.g. one per season and week), whether each contest
+goes to the row with the highest or lowest metric, and how the winner's
+entry is formatted. The engine evaluates every rule together: each source
+table is built once, and rules aggregating the same metric over the same
+keys share one group-by.
+
+Entries are emitted in the current _data schemas, i.e. accolades
+({manager: [{title, value, style}]}) and awards
+({manager: [{title, year, style}]}).
+
+Usage example:
+
+    rule = AwardRule(
+        title="Most Valuable Player ({season})",
+        source="starters",
+        metric="points",
+        aggregate=("manager", "season", "name"),
+        contest=("manager", "season"),
+        value="{name} ({points:0.2f} pts)",
+        style="mvp",
+        )
+
+    accolades, awards = AwardEngine(store).evaluate([rule])
+"""
+
+import pandas as pd
+
+from collections import defaultdict
+from dataclasses import dataclass
+
+from src.store import LeagueStore
+
+
+@dataclass(frozen=True, slots=True)
+class AwardRule:
+    """Definition of an award.
+
+    Attributes:
+        title (str): Title, formatted with the winning row
+        source (str): Source table (see AwardEngine.SOURCES)
+        metric (str): Column deciding each contest. With `aggregate` and
+            agg="count", the number of rows of each aggregate.
+        contest (tuple[str]): Keys of the contests, each won by one row.
+            Empty for a single contest over the whole table.
+        select (str): "max" or "min" of the metric wins, "first" takes the
+            first row of each contest
+        aggregate (tuple[str]): Keys to aggregate the metric over first
+        agg (str): Aggregation, "sum" or "count"
+        where (tuple): (column, value) pairs rows must equal
+        recipient (str): Column of the manager the entry goes to
+        tally (bool): Give each manager of the source a single entry,
+            formatted with the number of contests they won as {count}
+        value (str): Value, formatted with the winning row
+        year (str): Column of the winning row written as the entry's year
+        style (str): Entry style
+        output (str): "accolades" or "awards"
+        group (str): Rules of the same group have their entries ordered
+            by contest (e.g. season) first, then by rule
+    """
+
+    title: str
+    source: str
+    metric: str
+    contest: tuple = ()
+    select: str = "max"
+    aggregate: tuple = ()
+    agg: str = "sum"
+    where: tuple = ()
+    recipient: str = "manager"
+    tally: bool = False
+    value: str = None
+    year: str = None
+    style: str = None
+    output: str = "accolades"
+    group: str = None
+
+
+class AwardEngine:
+    """
+    Evaluator of award rules over the league datasets.
+
+    """
+
+    SOURCES = (
+        "matchups",
+        "standings",
+        "head_to_head",
+        "rostered",
+        "starters",
+    )
+
+    def __init__(self, store: LeagueStore):
+        """
+        Initialize AwardEngine class.
+
+        Args:
+            store (LeagueStore): League datasets
+        """
+
+        self.store = store
+
+        self._sources = {}
+        self._aggregates = {}
+
+    def source(self, name: str) -> pd.DataFrame:
+        """Source table of award rules, built once.
+
+        Args:
+            name (str): One of SOURCES, where "rostered" is every rostered
+                player with an NFL team, and "starters" every player not on
+                the bench
+        """
+
+        if name in self._sources:
+            return self._sources[name]
+
+        if name == "matchups":
+            df = self.store.matchups
+        elif name == "standings":
+            df = self.store.standings
+        elif name == "head_to_head":
+            df = self.store.head_to_head.view().reset_index()
+        elif name in ("rostered", "starters"):
+            df = self.players()
+            if name == "rostered":
+                df = df[df["nfl_team"] != "N/A"]
+            else:
+                df = df[df["slot"] != "BN"]
+        else:
+            raise RuntimeError(f"Unknown award source '{name}'")
+
+        self._sources[name] = df
+
+        return df
+
+    def players(self) -> pd.DataFrame:
+        """Every rostered player, with the season, week and manager of its
+        roster.
+        """
+
+        if "players" not in self._sources:
+
+            df = self.store.rosters.to_frame()
+            matchups = self.store.matchups
+
+            for column in ("season", "week", "manager"):
+                df[column] = matchups[column].to_numpy()[df["row"]]
+
+            self._sources["players"] = df
+
+        return self._sources["players"]
+
+    def aggregate(self,
+                  source: str,
+                  keys: tuple,
+                  metric: str,
+                  agg: str,
+                  ) -> pd.DataFrame:
+        """Metric aggregated over keys, shared by every rule asking for it.
+
+        Groups keep the order in which they first appear.
+        """
+
+        cache_key = (source, keys, metric, agg)
+
+        if cache_key not in self._aggregates:
+
+            grouped = self.source(source).groupby(
+                list(keys), sort=False, observed=True,
+                )
+
+            if agg == "count":
+                df = grouped.size().rename(metric)
+            else:
+                df = grouped[metric].agg(agg)
+
+            self._aggregates[cache_key] = df.reset_index()
+
+        return self._aggregates[cache_key]
+
+    def winners(self, rule: AwardRule) -> pd.DataFrame:
+        """Winning row of each contest of a rule, in contest order.
+        """
+
+        if rule.aggregate:
+            df = self.aggregate(
+                rule.source, rule.aggregate, rule.metric, rule.agg,
+                )
+        else:
+            df = self.source(rule.source)
+
+        for column, value in rule.where:
+            df = df[df[column] == value]
+
+        if rule.select != "first":
+            df = df[df[rule.metric].notna()]
+
+        if df.empty:
+            return df
+
+        contest = list(rule.contest)
+
+        if not contest:
+            grouped = df.assign(_contest=0).groupby("_contest")[rule.metric]
+        else:
+            grouped = df.groupby(contest, observed=True)[rule.metric]
+
+        if rule.select == "max":
+            k = grouped.idxmax()
+        elif rule.select == "min":
+            k = grouped.idxmin()
+        elif rule.select == "first":
+            k = grouped.apply(lambda group: group.index[0])
+        else:
+            raise RuntimeError(f"Unknown award selection '{rule.select}'")
+
+        return df.loc[k.to_numpy()]
+
+    def evaluate(self, rules: list) -> tuple:
+        """Evaluate award rules.
+
+        Args:
+            rules (list[AwardRule]): Rules, in the order their entries are
+                listed for each manager
+
+        Returns:
+            tuple[dict, dict]: Accolades and awards, by manager
+        """
+
+        # Entries, with the key they are listed in
+        entries = {"accolades": [], "awards": []}
+
+        groups = {}
+
+        for k, rule in enumerate(rules):
+
+            group = groups.setdefault(rule.group or k, k)
+
+            winners = self.winners(rule)
+
+            if rule.tally:
+
+                counts = winners[rule.recipient].astype(object).value_counts()
+
+                for manager in self.source(rule.source)[rule.recipient] \
+                        .dropna().unique():
+                    entry = self.entry(
+                        rule, {"count": int(counts.get(manager, 0))},
+                        )
+                    entries[rule.output].append(
+                        ((group, (), k), manager, entry)
+                        )
+
+                continue
+
+            for fields in winners.to_dict("records"):
+
+                contest = tuple(fields[key] for key in rule.contest)
+
+                entries[rule.output].append(
+                    ((group, contest, k),
+                     fields[rule.recipient],
+                     self.entry(rule, fields))
+                    )
+
+        results = []
+
+        for output in ("accolades", "awards"):
+
+            by_manager = defaultdict(list)
+
+            for _, manager, entry in sorted(
+                    entries[output], key=lambda item: item[0]):
+                by_manager[str(manager)].append(entry)
+
+            results.append(dict(by_manager))
+
+        return tuple(results)
+
+    def entry(self, rule: AwardRule, fields: dict) -> dict:
+        """Format the entry of a rule's winner.
+        """
+
+        entry = {"title": rule.title.format(**fields)}
+
+        if rule.value is not None:
+            entry["value"] = rule.value.format(**fields)
+
+        if rule.year is not None:
+            entry["year"] = int(fields[rule.year])
+
+        if rule.style is not None:
+            entry["style"] = rule.style
+
+        return entry
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+
+"""
+cache.py
+
+Persistent, content-addressed cache of Yahoo Fantasy Sports API responses.
+
+Responses are keyed by the YFPY method name and its arguments, and stored
+per season, and per league, under the project cache directory (calls that
+aren't scoped to a league, e.g. the user's leagues, are stored under
+"user"). The league queried for each season is recorded, so that a replay
+reads the responses of the same league. Seasons that have finished
+never change, so their responses are served from disk indefinitely. The
+in-progress season is always re-fetched (and written through), so that a
+replay of it reflects the most recent run.
+
+Usage example:
+
+    query = CachedQuery(YahooFantasySportsQuery(...), season=2021)
+    query.get_league_scoreboard_by_week(1)  # network, then disk
+
+    name, league_id, game_id = CachedQuery.find_league(2021)
+    replay = CachedQuery(
+        None, season=2021, offline=True, league_id=league_id, game_id=game_id,
+        )
+    replay.get_league_scoreboard_by_week(1)  # disk only
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def is_season_closed(season: int, today: date = None) -> bool:
+    """Determine if an NFL season has finished.
+
+    The fantasy season wraps up in early January of the following year,
+    and the NFL season ends with the Super Bowl in February. Any season
+    whose following March has started is considered final.
+
+    Args:
+        season (int): The NFL season (year)
+        today (date): Date to compare against. Defaults to today.
+    """
+
+    today = today or date.today()
+
+    return today >= date(season + 1, 3, 1)
+
+
+class CacheMiss(KeyError):
+    """Raised in offline (replay) mode when a response was never cached.
+    """
+
+
+class CachedQuery:
+    """Caching proxy around a YahooFantasySportsQuery.
+
+    Every method call is looked up by a SHA-256 digest of its name and
+    arguments. When `offline` is set, no query object is needed and
+    every call must be served from the cache.
+    """
+
+    CACHE_DIR = Path(__file__).parent.parent / "data" / "cache" / "responses"
+
+    # Index of the leagues queried in a season, by league name
+    LEAGUES_NAME = "leagues.json"
+
+    def __init__(self,
+                 query,
+                 season: int,
+                 offline: bool = False,
+                 cache_dir: Path = None,
+                 league_id: str = None,
+                 game_id: str = None,
+                 ):
+        """Initializes a new instance of CachedQuery.
+
+        Args:
+            query (YahooFantasySportsQuery): Query to forward misses to. May
+                be None when `offline` is set.
+            season (int): The season the query object was created for
+            offline (bool): Serve every call from the cache (replay mode)
+            cache_dir (Path): Optional override of the cache root directory
+            league_id (str): League the query object was created for. None
+                for calls that aren't scoped to a league.
+            game_id (str): Yahoo game ID of the season
+        """
+
+        self._query = query
+        self._season = season
+        self._offline = offline
+        self._immutable = offline or is_season_closed(season)
+
+        scope = "user" if league_id is None else f"{game_id}.l.{league_id}"
+
+        self._season_dir = (cache_dir or self.CACHE_DIR) / f"{season}"
+        self._dir = self._season_dir / scope
+        self._dir.mkdir(parents=True, exist_ok=True)
+
+    def record_league(self, name: str, league_id: str, game_id: str):
+        """Record the league queried for the season, for later replays.
+        """
+
+        path = self._season_dir / self.LEAGUES_NAME
+
+        leagues = {}
+        if path.exists():
+            with open(path, "r") as f:
+                leagues = json.load(f)
+
+        leagues[name] = {"league_id": str(league_id), "game_id": str(game_id)}
+
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(tmp_path, "w") as f:
+            json.dump(leagues, f)
+
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def find_league(cls,
+                    season: int,
+                    name: str = None,
+                    cache_dir: Path = None,
+                    ) -> tuple:
+        """Look up a league recorded for a season, to replay it.
+
+        Args:
+            season (int): The NFL season (year)
+            name (str): League name. May be omitted if a single league was
+                recorded.
+            cache_dir (Path): Optional override of the cache root directory
+
+        Returns:
+            tuple: (name, league_id, game_id)
+        """
+
+        path = (cache_dir or cls.CACHE_DIR) / f"{season}" / cls.LEAGUES_NAME
+
+        leagues = {}
+        if path.exists():
+            with open(path, "r") as f:
+                leagues = json.load(f)
+
+        if name is None and len(leagues) == 1:
+            name = next(iter(leagues))
+
+        if name not in leagues:
+            raise CacheMiss(
+                f"League {name!r} not cached for {season} "
+                f"(cached: {sorted(leagues)})."
+                )
+
+        return name, leagues[name]["league_id"], leagues[name]["game_id"]
+
+    def key(self, name: str, args: tuple, kwargs: dict) -> str:
+        """Content address of a single API call.
+        """
+
+        payload = json.dumps(
+            [name, list(args), sorted(kwargs.items())],
+            default=str,
+            )
+
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def path(self, key: str) -> Path:
+        return self._dir / key[:2] / f"{key}.pkl"
+
+    def __getattr__(self, name: str):
+
+        if self._offline:
+            attr = None
+        else:
+            attr = getattr(self._query, name)
+
+            if not callable(attr):
+                return attr
+
+        def call(*args, **kwargs):
+
+            path = self.path(self.key(name, args, kwargs))
+
+            if self._immutable and path.exists():
+                with open(path, "rb") as f:
+                    return pickle.load(f)
+
+            if self._offline:
+                raise CacheMiss(
+                    f"{name}{args} not cached for {self._season}."
+                    )
+
+            result = attr(*args, **kwargs)
+
+            # Write to a temporary file first, so that concurrent workers
+            # (or an interrupted run) never observe a partial entry
+            path.parent.mkdir(exist_ok=True)
+            tmp_path = path.with_suffix(
+                f".{os.getpid()}.{threading.get_ident()}.tmp"
+                )
+
+            with open(tmp_path, "wb") as f:
+                pickle.dump(result, f)
+
+            os.replace(tmp_path, path)
+
+            return result
+
+        return call
+
+
+class PlayerMetadataCache:
+    """Persistent map of Yahoo player metadata, shared across seasons.
+
+    Entries are keyed by the Yahoo player ID (the numeric part of a player
+    key), which is stable across seasons, while player keys are prefixed
+    by the season's game ID. Missing players are retrieved with bulk
+    multi-player requests.
+    """
+
+    PATH = Path(__file__).parent.parent / "data" / "cache" / "players.json"
+
+    # Maximum number of player keys Yahoo accepts per players collection
+    BATCH_SIZE = 25
+
+    def __init__(self, path: Path = None):
+        """Initializes a new instance of PlayerMetadataCache.
+
+        Args:
+            path (Path): Optional override of the cache file location
+        """
+
+        self.path = path or self.PATH
+
+        self.players = {}
+
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.players = json.load(f)
+
+    @staticmethod
+    def player_id(player_key: str) -> str:
+        return player_key.split(".p.")[-1]
+
+    @contextmanager
+    def lock(self):
+        """Hold an exclusive lock on the cache file, across processes.
+        """
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(self.path.with_suffix(".lock"), "a") as f:
+
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def save(self):
+        """Write the cache, merged with entries saved meanwhile by other
+        processes (e.g. backfill workers).
+        """
+
+        with self.lock():
+
+            if self.path.exists():
+                with open(self.path, "r") as f:
+                    self.players = {**json.load(f), **self.players}
+
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+
+            with open(tmp_path, "w") as f:
+                json.dump(self.players, f)
+
+            os.replace(tmp_path, self.path)
+
+    def get(self, query, player_keys: list) -> dict:
+        """Look up the metadata of many players.
+
+        Args:
+            query (YahooFantasySportsQuery): Query used to retrieve any
+                players missing from the cache
+            player_keys (list[str]): Yahoo player keys
+
+        Returns:
+            dict: player key -> {"full_name", "primary_position"}
+        """
+
+        missing = [
+            player_key for player_key in dict.fromkeys(player_keys)
+            if self.player_id(player_key) not in self.players
+            ]
+
+        for k in range(0, len(missing), self.BATCH_SIZE):
+
+            batch = ",".join(missing[k:k+self.BATCH_SIZE])
+
+            players = query.query(
+                "https://fantasysports.yahooapis.com/fantasy/v2/"
+                f"players;player_keys={batch}",
+                ["players"],
+                )
+
+            # A single-player collection is returned as {"player": Player}
+            if not isinstance(players, list):
+                players = [players["player"]]
+
+            for player in players:
+                self.players[self.player_id(player.player_key)] = {
+                    "full_name": player.full_name,
+                    "primary_position": player.primary_position,
+                }
+
+        if missing:
+            self.save()
+
+        return {
+            player_key: self.players[self.player_id(player_key)]
+            for player_key in player_keys
+            }
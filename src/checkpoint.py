@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+
+"""
+checkpoint.py
+
+Append-only logs of ingested data.
+
+Each (season, week, manager) matchup record is appended to a per-season
+JSON Lines file as soon as it has been parsed, so an interrupted ingestion
+(expired token, network failure, ...) can resume from the last completed
+unit instead of starting the season over. League transactions are streamed
+to a similar per-season log, alongside a cursor of the newest transaction
+already ingested.
+
+Usage example:
+
+    checkpoint = Checkpoint(2024)
+    done = checkpoint.load()
+    checkpoint.append(week, manager, record, final=True)
+"""
+
+import json
+import threading
+
+from pathlib import Path
+
+from src.records import MatchupRecord
+
+
+class AppendLog:
+    """Per-season, append-only JSON Lines file, safe to write from multiple
+    threads.
+    """
+
+    CACHE_DIR = Path(__file__).parent.parent / "data" / "cache"
+
+    # File name prefix of the log, i.e. <PREFIX>_<season>.jsonl
+    PREFIX = None
+
+    def __init__(self, season: int, cache_dir: Path = None):
+        """Initializes a new instance of AppendLog.
+
+        Args:
+            season (int): The season being ingested
+            cache_dir (Path): Optional override of the cache directory
+        """
+
+        self.season = season
+
+        self.cache_dir = cache_dir or self.CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.path = self.cache_dir / f"{self.PREFIX}_{season}.jsonl"
+
+        self.lock = threading.Lock()
+
+        self.repair()
+
+    def repair(self):
+        """Drop a trailing partial line left behind by an interrupted write,
+        so that new entries are appended on a line of their own.
+        """
+
+        if not self.path.exists():
+            return
+
+        with open(self.path, "rb+") as f:
+            data = f.read()
+
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def write(self, entry: dict):
+        """Durably append a single entry to the log.
+        """
+
+        line = json.dumps(entry)
+
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+                f.flush()
+
+    def read(self):
+        """Iterate over all entries in the log.
+
+        Lines that fail to parse (from an interrupted write) are skipped.
+        """
+
+        if not self.path.exists():
+            return
+
+        with open(self.path, "r") as f:
+            for line in f:
+
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def reset(self):
+        """Discard the log for the season.
+        """
+
+        self.path.unlink(missing_ok=True)
+
+
+class Checkpoint(AppendLog):
+    """Per-season, append-only store of parsed matchup records.
+
+    Records are only considered complete (and skipped on resume) once they
+    are final, i.e. the week has been played out. Later lines for the same
+    (week, manager) supersede earlier ones.
+    """
+
+    PREFIX = "checkpoint"
+
+    def append(self, week: int, manager: str, record: dict, final: bool):
+        """Durably record a parsed (season, week, manager) unit.
+
+        Args:
+            week (int): The week of the season
+            manager (str): The manager the record belongs to
+            record (dict): The parsed matchup record
+            final (bool): Whether the week is complete and won't change
+        """
+
+        self.write({
+            "week": week,
+            "manager": manager,
+            "final": final,
+            "record": record,
+        })
+
+    def load(self, final_only: bool = True) -> dict:
+        """Read back all checkpointed units.
+
+        Args:
+            final_only (bool): Only return records of completed weeks
+
+        Returns:
+            dict: (week, manager) -> MatchupRecord
+        """
+
+        units = {}
+
+        for unit in self.read():
+
+            if final_only and not unit["final"]:
+                continue
+
+            units[(unit["week"], unit["manager"])] = \
+                MatchupRecord.from_dict(unit["record"])
+
+        return units
+
+    def done(self) -> set:
+        """(week, manager) units of completed weeks, without holding on to
+        their records.
+        """
+
+        return {
+            (unit["week"], unit["manager"])
+            for unit in self.read() if unit["final"]
+            }
+
+
+class TransactionLog(AppendLog):
+    """Per-season, append-only store of league transaction records, with a
+    cursor of the newest transaction ingested so far.
+    """
+
+    PREFIX = "transactions"
+
+    def __init__(self, season: int, cache_dir: Path = None):
+        super().__init__(season, cache_dir)
+
+        self.cursor_path = self.path.with_suffix(".cursor.json")
+
+    def cursor(self):
+        """ID of the newest transaction already ingested, or None.
+        """
+
+        if not self.cursor_path.exists():
+            return None
+
+        with open(self.cursor_path, "r") as f:
+            return json.load(f)["transaction_id"]
+
+    def save_cursor(self, transaction_id: int):
+        with open(self.cursor_path, "w") as f:
+            json.dump({"transaction_id": transaction_id}, f)
+
+    def load(self) -> list:
+        """Read back all transaction records, oldest first.
+
+        Records re-written by an interrupted and then repeated ingestion
+        are only returned once.
+        """
+
+        records = {}
+
+        for record in self.read():
+            key = (
+                record["transaction_id"],
+                record["player_key"],
+                record["action"],
+                )
+            records[key] = record
+
+        return sorted(
+            records.values(),
+            key=lambda record: record["transaction_id"],
+            )
@@ -10,12 +10,13 @@ Usage example:
     gen.generate_page()
 """
 
-import json
-import pandas as pd
 import textwrap
 
 from pathlib import Path
 
+from src.store import LeagueStore
+from src.webdata import WebData
+
 
 class ContentGenerator:
     """
@@ -29,10 +30,20 @@ class ContentGenerator:
     SUBPAGES_DIR = Path(__file__).parent.parent / "_subpages"
     MGR_PAGES_DIR = SUBPAGES_DIR / "manager"
 
-    def __init__(self):
+    def __init__(self, store: LeagueStore = None, web: WebData = None):
+        """
+        Initialize ContentGenerator class.
+
+        Args:
+            store (LeagueStore): League datasets shared between stages
+            web (WebData): Writer of the _data outputs
+        """
+
+        self.store = store or LeagueStore(self.DATA_DIR)
+        self.web = web or WebData(web_data_dir=self.WEB_DATA_DIR)
 
-        self.df = pd.read_csv(self.DATA_DIR / 'data.csv')
-        self.df_standings = pd.read_csv(self.DATA_DIR / 'standings.csv')
+        self.df = self.store.matchups
+        self.df_standings = self.store.standings
 
         self.MGR_PAGES_DIR.mkdir(parents=True, exist_ok=True)
         self.WEB_DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -47,7 +58,7 @@ class ContentGenerator:
         avg_pa = average_stats_by_season['pa'].to_list()
 
         # Group by 'manager' and sum the 'wins' and 'losses'
-        manager_stats = self.df_standings.groupby('manager')[
+        manager_stats = self.df_standings.groupby('manager', observed=True)[
             ['wins',
              'losses',
              'pf',
@@ -64,13 +75,11 @@ class ContentGenerator:
         manager_stats = manager_stats.rename(columns={'manager': 'name'})
         manager_stats = manager_stats.round(1)
 
-        p = self.WEB_DATA_DIR / "overall.json"
-
-        with open(p, "w") as f:
-            manager_stats.to_json(f, orient='records', indent=3)
+        self.web.write("overall", manager_stats)
 
         # Group the data by 'manager' and calculate the totals
-        manager_stats = self.df_standings.groupby('manager').agg(
+        manager_stats = self.df_standings.groupby(
+            'manager', observed=True).agg(
             playoff_appearances=('seed', lambda x: (x <= 6).sum()),
             championship_appearances=('rank', lambda x: (x <= 2).sum()),
             championships=('rank', lambda x: (x == 1).sum())
@@ -79,7 +88,7 @@ class ContentGenerator:
         manager_stats = manager_stats.rename(columns={'manager': 'name'})
         manager_stats = manager_stats.reset_index()
 
-        grouped = self.df_standings.groupby('manager')
+        grouped = self.df_standings.groupby('manager', observed=True)
 
         # Create a dictionary to hold the final output
         json_output = {}
@@ -102,16 +111,13 @@ class ContentGenerator:
             # Add the manager's stats to the main output dictionary
             json_output[manager] = manager_stats
 
-        p = self.WEB_DATA_DIR / "seasons.json"
-
-        with open(p, "w") as f:
-            json.dump(json_output, f, indent=3)
+        self.web.write("seasons", json_output)
 
     def generate_chart_data(self):
         """Output _data/ assets
         """
 
-        df = pd.read_csv(self.DATA_DIR / "standings.csv")
+        df = self.store.standings
 
         managers = sorted(df["manager"].unique())
 
@@ -134,8 +140,7 @@ class ContentGenerator:
                 "championships": int(champs),
             })
 
-        with open(self.WEB_DATA_DIR / "playoffs.json", 'w') as f:
-            json.dump(data, f, indent=3)
+        self.web.write("playoffs", data)
 
     def generate_all_manager_pages(self):
         """
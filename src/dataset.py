@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+
+"""
+dataset.py
+
+On-disk weekly matchup dataset assembled from the per-season checkpoints.
+
+Matchups are written one season at a time, as a Parquet row group and as
+a chunk of rows appended to data.csv, so the full league history is never
+held in memory at once. Rosters are additionally normalized into a long,
+typed player-week table (one row per rostered player per week), so that
+analyses can group by player, slot or position without decoding the
+roster column of data.csv. Each matchup record also carries its matchup ID
+(see matchups.py) and the columns derived from its roster (see
+derived.py).
+
+Both tables are also kept as a dataset partitioned by league and season
+(data/dataset/<table>/league=<name>/season=<season>/), where each season's
+partition is only rewritten when that season is saved. Analyses of a
+single season read only its partition, however long the league history.
+
+Usage example:
+
+    with MatchupWriter(data_dir) as writer:
+        for season in seasons:
+            writer.write(season_df, league)
+
+    df_players = read_player_weeks(data_dir, columns=["player", "points"])
+
+    df = read_dataset(data_dir, "matchups", seasons=[2025], weeks=[1])
+"""
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from pathlib import Path
+from urllib.parse import quote
+
+from src import derived
+from src.matchups import matchup_ids
+
+
+# Low-cardinality strings are dictionary encoded, and read back as
+# pandas categoricals
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# Partition keys of the league dataset, as <key>=<value> directories
+PARTITIONING = ds.partitioning(
+    pa.schema([("league", pa.string()), ("season", pa.int16())]),
+    flavor="hive",
+    )
+
+
+class MatchupWriter:
+    """Incremental writer of data.csv, matchups.parquet and
+    player_weeks.parquet.
+
+    Each call to `write` appends one season of (week, manager) records.
+    The data.csv index keeps counting across seasons, so the file matches
+    one written from a single DataFrame of every season. The season's
+    partitions of the league dataset are replaced at the same time.
+    """
+
+    # Partition of seasons whose league is unknown (e.g. legacy caches)
+    DEFAULT_LEAGUE = "default"
+
+    # Roster entries are (name, nfl_team, slot, points, position, weekday)
+    ROSTER_TYPE = pa.list_(
+        pa.struct([
+            ("name", pa.string()),
+            ("nfl_team", pa.string()),
+            ("slot", pa.string()),
+            ("points", pa.float64()),
+            ("position", pa.string()),
+            ("weekday", pa.string()),
+            ])
+        )
+
+    # Fields of the records assembled from the checkpoints
+    RECORD_SCHEMA = pa.schema([
+        ("season", pa.int16()),
+        ("week", pa.int8()),
+        ("manager", pa.string()),
+        ("is_playoffs", pa.bool_()),
+        ("is_consolation", pa.bool_()),
+        ("points", pa.float64()),
+        ("proj_points", pa.float64()),
+        ("opp_points", pa.float64()),
+        ("opp_proj_points", pa.float64()),
+        ("opponent", pa.string()),
+        ("roster", ROSTER_TYPE),
+        ])
+
+    RECORD_COLUMNS = RECORD_SCHEMA.names
+
+    DERIVED_SCHEMA = pa.schema([
+        ("starter_points", pa.float64()),
+        ("bench_points", pa.float64()),
+        ("max_player_name", pa.string()),
+        ("max_player_score", pa.float64()),
+        ("min_player_name", pa.string()),
+        ("min_player_score", pa.float64()),
+        *[(column, pa.int8()) for column in derived.STARTER_COLUMNS],
+        ("opt_points", pa.float64()),
+        ])
+
+    SCHEMA = pa.schema([
+        *RECORD_SCHEMA, ("matchup_id", pa.int32()), *DERIVED_SCHEMA,
+        ])
+
+    COLUMNS = SCHEMA.names
+
+    PLAYER_SCHEMA = pa.schema([
+        ("season", pa.int16()),
+        ("week", pa.int8()),
+        ("manager", CATEGORY),
+        ("player", CATEGORY),
+        ("nfl_team", CATEGORY),
+        ("slot", CATEGORY),
+        ("points", pa.float64()),
+        ("position", CATEGORY),
+        ("weekday", CATEGORY),
+        ])
+
+    PLAYER_COLUMNS = PLAYER_SCHEMA.names
+
+    def __init__(self, data_dir: Path):
+        """Initializes a new instance of MatchupWriter.
+
+        Args:
+            data_dir (Path): Directory to write data.csv, matchups.parquet
+                and player_weeks.parquet to
+        """
+
+        self.csv_path = data_dir / "data.csv"
+        self.parquet_path = data_dir / "matchups.parquet"
+        self.player_path = data_dir / "player_weeks.parquet"
+        self.dataset_dir = data_dir / "dataset"
+
+        self.parquet_writer = pq.ParquetWriter(self.parquet_path, self.SCHEMA)
+        self.player_writer = pq.ParquetWriter(
+            self.player_path, self.PLAYER_SCHEMA,
+            )
+
+        self.num_rows = 0
+
+    def write(self, df: pd.DataFrame, league: str = None):
+        """Append a season of matchup records.
+
+        Args:
+            df (pd.DataFrame): Matchup records, with the columns in
+                RECORD_COLUMNS
+            league (str): Name of the league the season belongs to
+        """
+
+        df = df[self.RECORD_COLUMNS]
+        df.index = range(self.num_rows, self.num_rows + len(df))
+
+        df_players = self.player_weeks(df)
+
+        players = df_players.rename(columns={"player": "name"})
+        players["row"] = df_players.index - self.num_rows
+
+        df_derived = derived.matchup_columns(players, len(df))
+        df_derived.index = df.index
+        df_derived["matchup_id"] = matchup_ids(df)
+
+        df = pd.concat([df, df_derived], axis=1)[self.COLUMNS]
+
+        df.to_csv(
+            self.csv_path,
+            mode="w" if self.num_rows == 0 else "a",
+            header=self.num_rows == 0,
+            )
+
+        table = pa.Table.from_pandas(
+            df, schema=self.SCHEMA, preserve_index=False,
+            )
+        player_table = pa.Table.from_pandas(
+            df_players,
+            schema=self.PLAYER_SCHEMA,
+            preserve_index=False,
+            )
+
+        self.parquet_writer.write_table(table)
+        self.player_writer.write_table(player_table)
+
+        if len(df):
+            league = league or self.DEFAULT_LEAGUE
+            season = int(df["season"].iloc[0])
+
+            self.write_partition("matchups", table, league, season)
+            self.write_partition("player_weeks", player_table, league, season)
+
+        self.num_rows += len(df)
+
+    def write_partition(self,
+                        name: str,
+                        table: pa.Table,
+                        league: str,
+                        season: int,
+                        ):
+        """Replace a single (league, season) partition of a dataset table.
+
+        The partition keys are encoded in the directory names, so they are
+        dropped from the partition's file.
+        """
+
+        path = (
+            self.dataset_dir / name /
+            f"league={quote(league, safe='')}" / f"season={season}"
+            )
+        path.mkdir(parents=True, exist_ok=True)
+
+        pq.write_table(
+            table.drop_columns(["season"]), path / "part-0.parquet",
+            )
+
+    def player_weeks(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Normalize the roster column into one row per rostered player.
+
+        Args:
+            df (pd.DataFrame): Matchup records, with the columns in
+                RECORD_COLUMNS
+
+        Returns:
+            pd.DataFrame: Player-week records, with the columns in
+                PLAYER_COLUMNS
+        """
+
+        df = df[["season", "week", "manager", "roster"]].explode("roster")
+        df = df[df["roster"].notna()]
+
+        players = pd.DataFrame(
+            df["roster"].tolist(),
+            columns=self.PLAYER_COLUMNS[3:],
+            index=df.index,
+            )
+
+        return pd.concat(
+            [df[["season", "week", "manager"]], players], axis=1,
+            )
+
+    def close(self):
+        self.parquet_writer.close()
+        self.player_writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_player_weeks(data_dir: Path,
+                      columns: list = None,
+                      filters: list = None,
+                      ) -> pd.DataFrame:
+    """Load the player-week table written by MatchupWriter.
+
+    Args:
+        data_dir (Path): Directory containing player_weeks.parquet
+        columns (list[str]): Optional subset of PLAYER_COLUMNS to read
+        filters (list): Optional pyarrow predicates, e.g.
+            [("season", "==", 2024)], applied while reading
+
+    Returns:
+        pd.DataFrame: Player-week records, with categorical string columns
+    """
+
+    return pq.read_table(
+        data_dir / "player_weeks.parquet",
+        columns=columns,
+        filters=filters,
+        ).to_pandas()
+
+
+def read_dataset(data_dir: Path,
+                 name: str = "matchups",
+                 seasons: list = None,
+                 weeks: list = None,
+                 managers: list = None,
+                 leagues: list = None,
+                 columns: list = None,
+                 ) -> pd.DataFrame:
+    """Load a table of the league dataset, reading only the partitions and
+    columns needed.
+
+    Season and league filters select partitions (directories), while week
+    and manager filters are pushed down to the Parquet readers.
+
+    Args:
+        data_dir (Path): Directory containing the dataset directory
+        name (str): "matchups" or "player_weeks"
+        seasons (list[int]): Seasons to read. Defaults to all.
+        weeks (list[int]): Weeks to read. Defaults to all.
+        managers (list[str]): Managers to read. Defaults to all.
+        leagues (list[str]): Leagues to read. Defaults to all.
+        columns (list[str]): Columns to read. Defaults to all, with league
+            and season first.
+
+    Returns:
+        pd.DataFrame: The matching records
+    """
+
+    dataset = ds.dataset(
+        data_dir / "dataset" / name,
+        format="parquet",
+        partitioning=PARTITIONING,
+        )
+
+    filters = {
+        "season": seasons,
+        "week": weeks,
+        "manager": managers,
+        "league": leagues,
+    }
+
+    expression = None
+
+    for field, values in filters.items():
+
+        if values is None:
+            continue
+
+        predicate = ds.field(field).isin(values)
+        expression = predicate if expression is None else \
+            expression & predicate
+
+    if columns is None:
+        columns = ["league", "season"] + [
+            column for column in dataset.schema.names
+            if column not in ("league", "season")
+            ]
+
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
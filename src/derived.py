@@ -0,0 +1,98 @@
+"""
+derived.py
+
+Per-matchup columns derived from the rosters.
+
+Starter and bench totals, the best and worst scoring starters, the number
+of starters playing on each weekday, and the points of the optimal lineup
+are computed for every (season, week, manager) record in one vectorized
+pass over the rostered players, as the data is saved, so that awards and
+plots read them as plain columns instead of walking each roster.
+
+Usage example:
+
+    df_derived = matchup_columns(players, len(df))
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.lineup import RESERVE_SLOTS, count_rows, optimal_points
+
+
+# Starting slots left out of the best/worst scoring starter
+SCORER_EXCLUDED_SLOTS = ("K", "DEF")
+
+# Game days of starters, "BYE" for players whose team is on bye
+WEEKDAYS = (
+    "Sunday", "Monday", "Tuesday", "Wednesday", "Thursday", "Friday",
+    "Saturday", "BYE",
+    )
+
+STARTER_COLUMNS = [f"starters_{day.lower()}" for day in WEEKDAYS]
+
+COLUMNS = [
+    "starter_points",
+    "bench_points",
+    "max_player_name",
+    "max_player_score",
+    "min_player_name",
+    "min_player_score",
+    *STARTER_COLUMNS,
+    "opt_points",
+    ]
+
+
+def matchup_columns(players: pd.DataFrame, num_rows: int) -> pd.DataFrame:
+    """Compute the derived columns of every matchup record.
+
+    Args:
+        players (pd.DataFrame): One row per rostered player, with the
+            matchup record it belongs to (`row`, in [0, num_rows)), and its
+            `name`, `slot`, `points`, `position` and `weekday`
+        num_rows (int): Number of matchup records
+
+    Returns:
+        pd.DataFrame: The columns in COLUMNS, indexed by matchup record
+    """
+
+    players = players.reset_index(drop=True)
+
+    row = players["row"].to_numpy()
+    slot = players["slot"].astype(object)
+    points = players["points"].to_numpy(dtype=float)
+
+    starter = ~slot.isin(RESERVE_SLOTS).to_numpy()
+
+    df = pd.DataFrame(index=range(num_rows))
+
+    df["starter_points"] = np.bincount(
+        row[starter], weights=points[starter], minlength=num_rows,
+        )
+    df["bench_points"] = np.bincount(
+        row[~starter], weights=points[~starter], minlength=num_rows,
+        )
+
+    # Best and worst scoring starters, first listed on ties
+    scorers = players[starter & ~slot.isin(SCORER_EXCLUDED_SLOTS).to_numpy()]
+    scorers = scorers[scorers["points"].notna()]
+    by_row = scorers.groupby("row")["points"]
+
+    for column, k in (("max_player", by_row.idxmax()),
+                      ("min_player", by_row.idxmin())):
+        df[f"{column}_name"] = pd.Series(
+            players.loc[k, "name"].to_numpy(dtype=object), index=k.index,
+            ).reindex(df.index)
+        df[f"{column}_score"] = pd.Series(
+            players.loc[k, "points"].to_numpy(), index=k.index,
+            ).reindex(df.index)
+
+    weekday = players["weekday"].astype(object).to_numpy()
+    starters = count_rows(row[starter], weekday[starter], num_rows)
+
+    for day, column in zip(WEEKDAYS, STARTER_COLUMNS):
+        df[column] = starters.get(day, np.zeros(num_rows)).astype("int8")
+
+    df["opt_points"] = optimal_points(players, num_rows)
+
+    return df[COLUMNS]
@@ -0,0 +1,153 @@
+"""
+headtohead.py
+
+Head-to-head results cube of the weekly matchups.
+
+Every (season, manager, opponent, is_playoffs, is_consolation) cell holds
+the games played, wins, losses, points for and against, and the summed
+difference between actual and projected points, built in a single group-by
+pass over the matchups. Cells are additive, so all-time, per-season or
+playoff-only views are sums over the cube, without going back to the
+weekly data.
+
+Usage example:
+
+    h2h = HeadToHead(head_to_head(df))
+    df_all_time = h2h.view()
+    df_playoffs = h2h.view(seasons=[2024], playoffs=True)
+"""
+
+import numpy as np
+import pandas as pd
+
+
+KEYS = ["season", "manager", "opponent", "is_playoffs", "is_consolation"]
+
+# Additive measures of each cell
+MEASURES = [
+    "games",
+    "wins",
+    "losses",
+    "points_for",
+    "points_against",
+    "proj_games",
+    "proj_delta",
+    ]
+
+
+def head_to_head(df: pd.DataFrame) -> pd.DataFrame:
+    """Build the head-to-head cube.
+
+    Args:
+        df (pd.DataFrame): Weekly matchups, with `point_diff` (see
+            LeagueStore.matchups)
+
+    Returns:
+        pd.DataFrame: One row per cell, with the columns in KEYS and
+            MEASURES
+    """
+
+    df = df[df["opponent"].notna()]
+
+    cube = df[KEYS].assign(
+        games=1,
+        wins=(df["points"] > df["opp_points"]).astype(int),
+        losses=(df["points"] < df["opp_points"]).astype(int),
+        points_for=df["points"],
+        points_against=df["opp_points"],
+        proj_games=df["point_diff"].notna().astype(int),
+        proj_delta=df["point_diff"].fillna(0),
+        )
+
+    return cube.groupby(KEYS, observed=True).sum().reset_index()
+
+
+class HeadToHead:
+    """
+    Views of the head-to-head cube, aggregated over the selected cells.
+
+    """
+
+    def __init__(self, cube: pd.DataFrame):
+        """
+        Initialize HeadToHead class.
+
+        Args:
+            cube (pd.DataFrame): Cube built by `head_to_head`
+        """
+
+        self.cube = cube
+
+    def view(self,
+             seasons: list = None,
+             playoffs: bool = None,
+             consolation: bool = None,
+             by_season: bool = False,
+             ) -> pd.DataFrame:
+        """Head-to-head records of every manager against every opponent.
+
+        Args:
+            seasons (list[int]): Seasons to include. Defaults to all.
+            playoffs (bool): Only playoff (True) or regular season (False)
+                games. Defaults to both.
+            consolation (bool): Only consolation (True) or other (False)
+                games. Defaults to both.
+            by_season (bool): Keep seasons apart, instead of summing them
+
+        Returns:
+            pd.DataFrame: MEASURES, plus the win percentage (`win_pct`, over
+                decided games) and the average projection delta
+                (`avg_proj_delta`), indexed by (manager, opponent), or by
+                (season, manager, opponent) if by_season
+        """
+
+        cube = self.cube
+
+        mask = np.ones(len(cube), dtype=bool)
+
+        if seasons is not None:
+            mask &= cube["season"].isin(seasons).to_numpy()
+        if playoffs is not None:
+            mask &= (cube["is_playoffs"] == playoffs).to_numpy()
+        if consolation is not None:
+            mask &= (cube["is_consolation"] == consolation).to_numpy()
+
+        keys = ["manager", "opponent"]
+        if by_season:
+            keys = ["season"] + keys
+
+        df = cube[mask].groupby(keys, observed=True)[MEASURES].sum()
+
+        decided = df["wins"] + df["losses"]
+        df["win_pct"] = df["wins"] / decided.where(decided > 0)
+        df["avg_proj_delta"] = df["proj_delta"] / df["proj_games"].where(
+            df["proj_games"] > 0
+            )
+
+        return df
+
+    def rivals(self, **kwargs) -> pd.DataFrame:
+        """Each manager's rival (lowest win percentage) and patsy (highest
+        win percentage) opponent.
+
+        Args:
+            **kwargs: Cell selection, see `view`
+
+        Returns:
+            pd.DataFrame: `rival`, `rival_win_pct`, `patsy` and
+                `patsy_win_pct`, indexed by manager
+        """
+
+        win_pct = self.view(**kwargs)["win_pct"].dropna()
+
+        by_manager = win_pct.groupby(level="manager", observed=True)
+
+        rival = win_pct.loc[by_manager.idxmin()]
+        patsy = win_pct.loc[by_manager.idxmax()]
+
+        return pd.DataFrame({
+            "rival": rival.index.get_level_values("opponent"),
+            "rival_win_pct": rival.to_numpy(),
+            "patsy": patsy.index.get_level_values("opponent"),
+            "patsy_win_pct": patsy.to_numpy(),
+            }, index=rival.index.get_level_values("manager"))
@@ -0,0 +1,236 @@
+"""
+lineup.py
+
+Vectorized, exact optimal-lineup solver.
+
+Given every rostered player of many (season, week, manager) rosters, the
+solver finds the highest scoring assignment of players to each roster's
+starting slots, for all rosters at once.
+
+A starting slot is either dedicated to a single position (QB, WR, ...), or
+a flex slot open to several positions (W/T, W/R/T). Flex slots are nested,
+i.e. each one's positions include those of the flex slots before it. For
+such rosters, filling the dedicated slots with the best players of each
+position, and then each flex slot in turn with the best remaining eligible
+players, is optimal (a flex slot can never do better by taking a player
+away from a more restrictive slot).
+
+The outcomes of the optimal lineups, i.e. the points left on the bench and
+the losses an optimal lineup would have turned into wins ("flips"), are
+derived from the actual and optimal points, so callers holding the
+materialized starter_points and opt_points columns (see derived.py) need
+not solve the lineups again.
+
+Usage example:
+
+    opt_points = optimal_points(players, num_rows)
+
+    df_lineups = solve_lineups(players, df["opp_points"])
+    df_lineups = lineup_outcomes(
+        df["starter_points"], df["opt_points"], df["opp_points"],
+        )
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Slots that hold reserves, not starters
+RESERVE_SLOTS = ("BN", "IR")
+
+# Flex slots and their eligible positions, from most to least restrictive
+FLEX_SLOTS = {
+    "W/T": ("WR", "TE"),
+    "W/R/T": ("WR", "RB", "TE"),
+    "Q/W/R/T": ("QB", "WR", "RB", "TE"),
+}
+
+
+def count_rows(row: np.ndarray, values: np.ndarray, num_rows: int) -> dict:
+    """Count the occurrences of each value, per row.
+
+    Args:
+        row (np.ndarray): Row of each value, in [0, num_rows)
+        values (np.ndarray): Values to count
+        num_rows (int): Number of rows
+
+    Returns:
+        dict: Array of counts indexed by row, per distinct value
+    """
+
+    codes, uniques = pd.factorize(values)
+
+    counts = np.bincount(
+        row * len(uniques) + codes, minlength=num_rows * len(uniques),
+        ).reshape(num_rows, len(uniques))
+
+    return {value: counts[:, k] for k, value in enumerate(uniques)}
+
+
+def optimal_lineup(players: pd.DataFrame, num_rows: int) -> np.ndarray:
+    """Select the players of the optimal lineup of every roster.
+
+    The starting slots of a roster are those its actual lineup used.
+
+    Args:
+        players (pd.DataFrame): One row per rostered player, with the
+            roster it belongs to (`row`, in [0, num_rows)), and its `slot`,
+            `position` and `points` (missing points count as 0)
+        num_rows (int): Number of rosters
+
+    Returns:
+        np.ndarray: Boolean mask of the players in an optimal lineup
+    """
+
+    row = players["row"].to_numpy()
+    slot_codes, slots = pd.factorize(players["slot"])
+    position_codes, positions = pd.factorize(players["position"])
+    points = np.nan_to_num(players["points"].to_numpy(dtype=float))
+
+    def codes_of(names) -> np.ndarray:
+        return np.flatnonzero(np.isin(positions.astype(object), names))
+
+    starter = ~np.isin(slot_codes, np.flatnonzero(
+        np.isin(slots.astype(object), RESERVE_SLOTS)
+        ))
+
+    # Number of starting slots of each kind, per roster
+    slot_counts = count_rows(
+        row[starter], slots.astype(object)[slot_codes[starter]], num_rows,
+        )
+
+    def num_slots(name: str) -> np.ndarray:
+        if name not in slot_counts:
+            return np.zeros(num_rows, dtype=int)
+        return slot_counts[name]
+
+    # Players sorted by roster, then by points (best first)
+    order = np.lexsort((-points, row))
+
+    selected = np.zeros(len(players), dtype=bool)
+
+    def fill(eligible: np.ndarray, capacity: np.ndarray, keys: np.ndarray):
+        """Select, within each group of `keys`, the best eligible players
+        up to the group's capacity.
+        """
+
+        k = order[eligible[order] & ~selected[order]]
+
+        # Group the players, keeping them best first within each group
+        k = k[np.argsort(keys[k], kind="stable")]
+
+        # Rank of each player within its group
+        index = np.arange(len(k))
+        start = np.ones(len(k), dtype=bool)
+        start[1:] = keys[k][1:] != keys[k][:-1]
+        rank = index - np.maximum.accumulate(np.where(start, index, 0))
+
+        selected[k[rank < capacity[k]]] = True
+
+    # Dedicated slots take the best players of their position
+    dedicated = np.zeros(len(players), dtype=int)
+    for name in slot_counts:
+        if name in FLEX_SLOTS:
+            continue
+        is_position = np.isin(position_codes, codes_of([name]))
+        dedicated[is_position] = num_slots(name)[row[is_position]]
+
+    fill(
+        dedicated > 0,
+        dedicated,
+        row * (len(positions) + 1) + position_codes,
+        )
+
+    # Flex slots, from most to least restrictive, take the best remaining
+    for name, eligible in FLEX_SLOTS.items():
+        fill(
+            np.isin(position_codes, codes_of(eligible)),
+            num_slots(name)[row],
+            row,
+            )
+
+    return selected
+
+
+def optimal_points(players: pd.DataFrame, num_rows: int) -> np.ndarray:
+    """Points of the optimal lineup of every roster.
+
+    Args:
+        players (pd.DataFrame): See `optimal_lineup`
+        num_rows (int): Number of rosters
+
+    Returns:
+        np.ndarray: Optimal points, indexed by roster
+    """
+
+    selected = optimal_lineup(players, num_rows)
+
+    return np.bincount(
+        players["row"].to_numpy()[selected],
+        weights=np.nan_to_num(
+            players["points"].to_numpy(dtype=float)[selected],
+            ),
+        minlength=num_rows,
+        )
+
+
+def lineup_outcomes(actual: np.ndarray,
+                    optimal: np.ndarray,
+                    opp_points: np.ndarray,
+                    ) -> pd.DataFrame:
+    """Compare actual lineups with their optimal counterparts.
+
+    Args:
+        actual (np.ndarray): Points scored by the starters of each roster
+        optimal (np.ndarray): Points of each roster's optimal lineup
+        opp_points (np.ndarray): Points scored by each roster's opponent
+
+    Returns:
+        pd.DataFrame: Per roster, the actual and optimal points, whether the
+            lineup was optimal, the squandered (bench) points, and whether
+            the optimal lineup would have flipped a loss into a win
+    """
+
+    actual = np.asarray(actual, dtype=float)
+    optimal = np.asarray(optimal, dtype=float)
+    opp_points = np.asarray(opp_points, dtype=float)
+
+    # Points are summed in a different order, so compare with a tolerance
+    is_optimal = np.isclose(actual, optimal)
+
+    return pd.DataFrame({
+        "starter_points": actual,
+        "opt_points": optimal,
+        "is_optimal": is_optimal,
+        "squandered_points": np.where(is_optimal, 0.0, optimal - actual),
+        "flip": ~is_optimal & (optimal > opp_points) & (actual < opp_points),
+        })
+
+
+def solve_lineups(players: pd.DataFrame,
+                  opp_points: np.ndarray,
+                  ) -> pd.DataFrame:
+    """Solve the optimal lineup of every roster, and its outcomes.
+
+    Args:
+        players (pd.DataFrame): See `optimal_lineup`
+        opp_points (np.ndarray): Points scored by each roster's opponent,
+            which also sets the number of rosters
+
+    Returns:
+        pd.DataFrame: See `lineup_outcomes`
+    """
+
+    num_rows = len(opp_points)
+
+    row = players["row"].to_numpy()
+    points = np.nan_to_num(players["points"].to_numpy(dtype=float))
+    starter = ~players["slot"].astype(object).isin(RESERVE_SLOTS).to_numpy()
+
+    actual = np.bincount(
+        row[starter], weights=points[starter], minlength=num_rows,
+        )
+
+    return lineup_outcomes(
+        actual, optimal_points(players, num_rows), opp_points,
+        )
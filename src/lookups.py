@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+"""
+lookups.py
+
+Precomputed, per-season lookup tables used while enriching Yahoo rosters
+with NFL data that YFPY does not provide.
+
+Usage example:
+
+    index = PlayerIndex(nflreadpy.load_rosters_weekly(2024).to_pandas())
+    team, position = index.lookup(week, player)
+"""
+
+import numpy as np
+import pandas as pd
+
+from yfpy.models import Player
+
+
+class PlayerIndex:
+    """Hashed player-identity index over a season of weekly NFL rosters.
+
+    Yahoo players are matched to the weekly roster through a cascade of
+    increasingly loose identity keys. Each tier is a dictionary from key to
+    the matching roster rows, sorted by week, so that resolving a player's
+    team for a given week is a dictionary lookup plus a binary search.
+    """
+
+    # Identity tiers, in order of preference
+    TIERS = (
+        "yahoo_id",
+        "full_name",
+        ("first_name", "last_name"),
+        ("first_initial", "last_name"),
+        ("position", "last_name"),
+        )
+
+    def __init__(self, weekly_roster: pd.DataFrame):
+        """Build the index for a single season.
+
+        Args:
+            weekly_roster (pd.DataFrame): Season weekly rosters, as loaded
+                from nflreadpy.load_rosters_weekly
+        """
+
+        self.weeks = weekly_roster["week"].to_numpy()
+        self.teams = weekly_roster["team"].to_numpy()
+        self.positions = weekly_roster["position"].to_numpy()
+
+        keys = weekly_roster[
+            ["yahoo_id", "full_name", "first_name", "last_name", "position"]
+            ].reset_index(drop=True)
+        keys["first_initial"] = keys["first_name"].str[0]
+
+        self.tiers = []
+
+        for tier in self.TIERS:
+            groups = keys.groupby(
+                list(tier) if isinstance(tier, tuple) else tier,
+                sort=False,
+                ).indices
+
+            # Stable sort keeps roster order between rows of the same week
+            self.tiers.append({
+                key: rows[np.argsort(self.weeks[rows], kind="stable")]
+                for key, rows in groups.items()
+                })
+
+    def player_keys(self, player: Player) -> tuple:
+        """Identity keys of a Yahoo player, one per tier.
+        """
+
+        first_name = player.first_name
+        last_name_trim = player.last_name.split()[0]
+
+        return (
+            f"{player.player_id}",
+            f"{player.full_name}",
+            (first_name, last_name_trim),
+            (first_name[:1], last_name_trim),
+            (player.primary_position, last_name_trim),
+            )
+
+    def nearest_row(self, rows: np.ndarray, week: int) -> int:
+        """Roster row closest in time to `week`.
+
+        Ties between an earlier and a later week are resolved in favor of
+        the row appearing first in the original roster.
+        """
+
+        weeks = self.weeks[rows]
+
+        k = np.searchsorted(weeks, week, side="left")
+
+        if k == len(weeks):
+            k_lo = np.searchsorted(weeks, weeks[-1], side="left")
+            return rows[k_lo]
+
+        if k == 0 or weeks[k] == week:
+            return rows[k]
+
+        k_lo = np.searchsorted(weeks, weeks[k-1], side="left")
+
+        d_lo = week - weeks[k_lo]
+        d_hi = weeks[k] - week
+
+        if d_lo < d_hi or (d_lo == d_hi and rows[k_lo] < rows[k]):
+            return rows[k_lo]
+
+        return rows[k]
+
+    def lookup(self, week: int, player: Player):
+        """Resolve a player's NFL team and position for a given week.
+
+        Args:
+            week (int): The week of the season
+            player (yfpy.models.Player): The Yahoo player to resolve
+
+        Returns:
+            tuple: (team, position), or None if the player is not found
+        """
+
+        for tier, key in zip(self.tiers, self.player_keys(player)):
+
+            rows = tier.get(key)
+
+            if rows is not None:
+                row = self.nearest_row(rows, week)
+                return (self.teams[row], self.positions[row])
+
+        return None
+
+
+class ScheduleIndex:
+    """Lookup of the weekday each NFL team plays on, per week of a season.
+
+    Built once per season from the nflreadpy schedule, so that enriching
+    every rostered player is a constant-time dictionary lookup.
+    """
+
+    def __init__(self, sched: pd.DataFrame, season: int):
+        """Build the index for a single season.
+
+        Args:
+            sched (pd.DataFrame): Season schedule, as loaded from
+                nflreadpy.load_schedules
+            season (int): The NFL season of the schedule
+        """
+
+        self.season = season
+
+        self.teams = set(sched["home_team"].unique())
+
+        self.week_days = {}
+        self.multiple_games = set()
+
+        for week, home_team, away_team, week_day in zip(
+                sched["week"], sched["home_team"],
+                sched["away_team"], sched["weekday"]):
+
+            for team in (home_team, away_team):
+
+                if (week, team) in self.week_days:
+                    self.multiple_games.add((week, team))
+
+                self.week_days[(week, team)] = week_day
+
+    def schedule_team(self, team: str) -> str:
+        """Normalize a player's team abbreviation to the schedule's.
+        """
+
+        if self.season < 2020 and team == "LV":
+            return "OAK"
+
+        if team == "LAR":
+            return "LA"
+
+        return team
+
+    def week_day(self, week: int, team: str) -> str:
+        """Weekday that `team` plays on in `week`, or "BYE".
+
+        Args:
+            week (int): The week of the season
+            team (str): The player's team abbreviation
+        """
+
+        team = self.schedule_team(team)
+
+        if team not in self.teams:
+            raise RuntimeError(
+                "Failed to identify player-team schedule."
+                )
+
+        if (week, team) in self.multiple_games:
+            raise RuntimeError(
+                "Multipe player-teams found."
+                )
+
+        return self.week_days.get((week, team), "BYE")
@@ -0,0 +1,177 @@
+"""
+managers.py
+
+Manager dimension of the league datasets.
+
+Yahoo nicknames are mapped to their public alias (manager_aliases.json)
+exactly once, as data is saved, and every nickname seen is recorded in
+data/managers.csv along with its integer ID and display name. Consumers
+use the dimension to carry managers as categorical codes instead of free
+strings, with the same code for a manager in every table.
+
+Usage example:
+
+    managers = ManagerDimension()
+    managers.apply(df)
+    managers.save(data_dir / "managers.csv")
+
+    categorize(df, dtype=manager_dtype(pd.read_csv("managers.csv")))
+"""
+
+import json
+import pandas as pd
+
+from pathlib import Path
+
+
+class ManagerDimension:
+    """
+    Mapping of manager nicknames to aliases and display names.
+
+    """
+
+    ALIASES_PATH = Path("manager_aliases.json")
+
+    COLUMNS = ["manager_id", "nickname", "alias", "display_name"]
+
+    def __init__(self, aliases_path: Path = None):
+        """
+        Initialize ManagerDimension class.
+
+        Args:
+            aliases_path (Path): Optional override of the aliases file
+        """
+
+        aliases_path = aliases_path or self.ALIASES_PATH
+
+        self.aliases = {}
+
+        if aliases_path.exists():
+            with open(aliases_path, "r") as f:
+                self.aliases = json.load(f)
+
+        # Every nickname seen so far, in order of appearance
+        self.nicknames = {}
+
+    def alias(self, nickname: str) -> str:
+        """Display name of a single manager nickname.
+        """
+
+        if nickname is None:
+            return None
+
+        self.nicknames[nickname] = None
+
+        return self.aliases.get(nickname, nickname)
+
+    def apply(self,
+              df: pd.DataFrame,
+              columns: tuple = ("manager", "opponent"),
+              ):
+        """Replace manager nicknames with their display names, in place.
+
+        Only whole nicknames are replaced, so a nickname contained in
+        another is left untouched.
+
+        Args:
+            df (pd.DataFrame): Frame to update
+            columns (tuple[str]): Manager columns of the frame
+        """
+
+        for column in columns:
+
+            if column not in df.columns:
+                continue
+
+            for nickname in df[column].dropna().unique():
+                self.nicknames[nickname] = None
+
+            df[column] = df[column].replace(self.aliases)
+
+    def frame(self, nicknames=None) -> pd.DataFrame:
+        """Dimension table of managers.
+
+        IDs follow the alphabetical order of display names, and are shared
+        by nicknames with the same alias.
+
+        Args:
+            nicknames (iterable[str]): Nicknames to include. Defaults to
+                every nickname seen.
+        """
+
+        if nicknames is None:
+            nicknames = self.nicknames
+
+        df = pd.DataFrame({"nickname": sorted(nicknames)})
+        df["alias"] = df["nickname"].map(self.aliases)
+        df["display_name"] = df["alias"].fillna(df["nickname"])
+
+        names = sorted(df["display_name"].unique())
+        df["manager_id"] = df["display_name"].map(
+            {name: k for k, name in enumerate(names)}
+            )
+
+        return df[self.COLUMNS]
+
+    def save(self, path: Path):
+        """Write the dimension table, keeping managers recorded by earlier
+        runs.
+        """
+
+        nicknames = dict(self.nicknames)
+
+        if path.exists():
+            for nickname in pd.read_csv(path)["nickname"]:
+                nicknames[nickname] = None
+
+        self.frame(nicknames).to_csv(path, index=False)
+
+
+def manager_dtype(managers: pd.DataFrame) -> pd.CategoricalDtype:
+    """Categorical dtype of manager columns, i.e. the display names of the
+    manager dimension ordered by manager ID.
+
+    Args:
+        managers (pd.DataFrame): Dimension table (see
+            ManagerDimension.frame)
+    """
+
+    names = managers.sort_values("manager_id", kind="stable") \
+        .drop_duplicates("manager_id")["display_name"]
+
+    return pd.CategoricalDtype(names.tolist())
+
+
+def categorize(df: pd.DataFrame,
+               columns: tuple = ("manager", "opponent"),
+               dtype: pd.CategoricalDtype = None,
+               ):
+    """Convert manager columns of a frame to categoricals, in place.
+
+    Every column shares the same categories, so that columns can be
+    compared to one another, and codes agree between frames converted with
+    the same dtype. Managers missing from the dtype are added after its
+    categories, in alphabetical order.
+
+    Args:
+        df (pd.DataFrame): Frame to update
+        columns (tuple[str]): Manager columns of the frame
+        dtype (pd.CategoricalDtype): Categories of the manager dimension
+            (see `manager_dtype`). Defaults to the managers appearing in
+            the frame, in alphabetical order.
+    """
+
+    columns = [column for column in columns if column in df.columns]
+
+    categories = set()
+    for column in columns:
+        categories.update(df[column].dropna().unique())
+
+    known = [] if dtype is None else list(dtype.categories)
+    unknown = sorted(categories - set(known))
+
+    if unknown or dtype is None:
+        dtype = pd.CategoricalDtype([*known, *unknown])
+
+    for column in columns:
+        df[column] = df[column].astype(dtype)
@@ -0,0 +1,124 @@
+"""
+matchups.py
+
+Both sides of each weekly matchup.
+
+The weekly records hold one row per manager, so each head-to-head game
+appears twice, once from each side. Every row carries a stable matchup ID,
+shared by both sides of a game, and rows are paired with their opponent's
+row in a single vectorized self-join, instead of searching the frame for
+the opponent of each row.
+
+Usage example:
+
+    df["matchup_id"] = matchup_ids(df)
+    df_pairs = pair_matchups(df, ["points", "starters_monday"])
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _names(column: pd.Series) -> np.ndarray:
+    return column.astype(object).fillna("").to_numpy(dtype=str)
+
+
+def matchup_ids(df: pd.DataFrame) -> np.ndarray:
+    """Stable ID of every weekly matchup.
+
+    IDs read as <season><week:02d><game:02d>, where the games of a week are
+    numbered in the alphabetical order of their managers. Both sides of a
+    game share its ID.
+
+    Args:
+        df (pd.DataFrame): Weekly matchups, with `season`, `week`,
+            `manager` and `opponent`
+
+    Returns:
+        np.ndarray: The ID of each row's matchup
+    """
+
+    season = df["season"].to_numpy(dtype=np.int64)
+    week = df["week"].to_numpy(dtype=np.int64)
+    manager = _names(df["manager"])
+    opponent = _names(df["opponent"])
+
+    first = np.where(manager <= opponent, manager, opponent)
+    second = np.where(manager <= opponent, opponent, manager)
+
+    order = np.lexsort((second, first, week, season))
+
+    def changed(values: np.ndarray) -> np.ndarray:
+        values = values[order]
+        return np.r_[True, values[1:] != values[:-1]]
+
+    new_week = changed(season) | changed(week)
+    new_game = new_week | changed(first) | changed(second)
+
+    # Number games from 0 within each week
+    games = np.cumsum(new_game)
+    games -= np.maximum.accumulate(np.where(new_week, games, 0))
+
+    ids = np.empty(len(df), dtype=np.int32)
+    ids[order] = season[order] * 10000 + week[order] * 100 + games
+
+    return ids
+
+
+def opponent_rows(df: pd.DataFrame) -> np.ndarray:
+    """Position of each row's opponent row.
+
+    Args:
+        df (pd.DataFrame): Weekly matchups, with `matchup_id`, `manager`
+            and `opponent`
+
+    Returns:
+        np.ndarray: Position (iloc) of the opponent's row, -1 if missing
+    """
+
+    manager = _names(df["manager"])
+    opponent = _names(df["opponent"])
+
+    sides = pd.DataFrame({
+        "matchup_id": df["matchup_id"].to_numpy(),
+        "manager": manager,
+        "opponent": opponent,
+        })
+    opponents = pd.DataFrame({
+        "matchup_id": df["matchup_id"].to_numpy(),
+        "manager": opponent,
+        "opponent": manager,
+        "opp_row": np.arange(len(df)),
+        })
+
+    # A left merge keeps the order of the left rows
+    opp_row = sides.merge(
+        opponents, on=["matchup_id", "manager", "opponent"], how="left",
+        )["opp_row"]
+
+    return opp_row.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def pair_matchups(df: pd.DataFrame, columns: list = ()) -> pd.DataFrame:
+    """Pair each row with its opponent's row.
+
+    Args:
+        df (pd.DataFrame): Weekly matchups, with `matchup_id`, `manager`
+            and `opponent`
+        columns (list[str]): Columns of the opponent's row to include
+
+    Returns:
+        pd.DataFrame: `opp_row` (see `opponent_rows`), and each of the
+            opponent's columns as opp_<column>, aligned with df
+    """
+
+    opp_row = opponent_rows(df)
+
+    pairs = pd.DataFrame({"opp_row": opp_row}, index=df.index)
+
+    for column in columns:
+        # Missing opponents (-1) are outside the index, and read as NaN
+        values = df[column].reset_index(drop=True).reindex(opp_row)
+        pairs[f"opp_{column}"] = values.to_numpy()
+
+    return pairs
@@ -0,0 +1,284 @@
+"""
+odds.py
+
+Championship and playoff odds conditional on a manager's record.
+
+Every manager's cumulative regular season record is computed at every week
+of every season in one vectorized pass. Across the finished seasons, each
+(week, wins, losses) record is then counted along with how many of the
+managers holding it went on to make the playoffs and to win the league,
+giving P(champion | record after week w) and P(playoffs | record after
+week w).
+
+Counts of finished seasons are cached (data/odds_counts.csv), each season
+stamped with a digest of its own matchups and standings, and only seasons
+missing from the cache, or whose data changed, are counted. Each new week
+then only recomputes the season in progress, which is never counted; its
+managers are looked up in the table by their current record.
+
+Usage example:
+
+    odds = ChampionshipOdds(store, web)
+    df_odds = odds.update()
+"""
+
+import hashlib
+import os
+import pandas as pd
+
+from src.cache import is_season_closed
+from src.store import LeagueStore
+from src.webdata import WebData
+
+
+RECORD_KEYS = ["week", "wins", "losses"]
+
+
+def cumulative_records(df: pd.DataFrame) -> pd.DataFrame:
+    """Cumulative regular season record of every manager after every week.
+
+    Ties count as neither wins nor losses.
+
+    Args:
+        df (pd.DataFrame): Weekly matchups
+
+    Returns:
+        pd.DataFrame: season, manager, week, wins and losses
+    """
+
+    df = df[~df["is_playoffs"].astype(bool)]
+    df = df.sort_values(["season", "manager", "week"], kind="stable")
+
+    results = pd.DataFrame({
+        "season": df["season"].to_numpy(),
+        "manager": df["manager"].astype(object).to_numpy(),
+        "week": df["week"].to_numpy(),
+        "wins": (df["points"] > df["opp_points"]).to_numpy(dtype=int),
+        "losses": (df["points"] < df["opp_points"]).to_numpy(dtype=int),
+        })
+
+    results[["wins", "losses"]] = results.groupby(
+        ["season", "manager"], sort=False,
+        )[["wins", "losses"]].cumsum()
+
+    return results
+
+
+class ChampionshipOdds:
+    """
+    Conditional championship/playoff odds table, built incrementally.
+
+    """
+
+    CACHE_NAME = "odds_counts.csv"
+
+    # Seeds that make the playoffs, as counted by the site (see contentgen)
+    PLAYOFF_SEEDS = 6
+
+    COUNT_COLUMNS = ["managers", "champions", "playoffs"]
+
+    # Inputs of a season's counts, and the keys they are ordered by
+    SOURCE_COLUMNS = {
+        "matchups": (
+            ["week", "manager"],
+            ["is_playoffs", "points", "opp_points"],
+            ),
+        "standings": (
+            ["manager"],
+            ["seed", "rank"],
+            ),
+    }
+
+    def __init__(self, store: LeagueStore = None, web: WebData = None):
+        """
+        Initialize ChampionshipOdds class.
+
+        Args:
+            store (LeagueStore): League datasets
+            web (WebData): Writer of the _data outputs
+        """
+
+        self.store = store or LeagueStore()
+        self.web = web or WebData()
+
+        self.cache_path = self.store.data_dir / self.CACHE_NAME
+
+    def outcomes(self, records: pd.DataFrame) -> pd.DataFrame:
+        """Add whether each record's manager made the playoffs and won the
+        league that season.
+        """
+
+        standings = self.store.standings
+
+        playoffs = standings[standings["seed"] <= self.PLAYOFF_SEEDS]
+        playoffs = set(zip(
+            playoffs["season"], playoffs["manager"].astype(object),
+            ))
+
+        champions = standings[standings["rank"] == 1]
+        champions = set(zip(
+            champions["season"], champions["manager"].astype(object),
+            ))
+
+        keys = pd.Series(list(zip(records["season"], records["manager"])))
+
+        return records.assign(
+            playoffs=keys.isin(playoffs).to_numpy(),
+            champion=keys.isin(champions).to_numpy(),
+            )
+
+    def count(self, seasons: list) -> pd.DataFrame:
+        """Count the records held after each week of finished seasons, and
+        their outcomes.
+
+        Args:
+            seasons (list[int]): Seasons to count
+
+        Returns:
+            pd.DataFrame: season, RECORD_KEYS and COUNT_COLUMNS
+        """
+
+        df = self.store.matchups
+        records = cumulative_records(df[df["season"].isin(seasons)])
+        records = self.outcomes(records)
+
+        return records.groupby(["season", *RECORD_KEYS]).agg(
+            managers=("manager", "size"),
+            champions=("champion", "sum"),
+            playoffs=("playoffs", "sum"),
+            ).reset_index()
+
+    def season_stamps(self, seasons: list) -> dict:
+        """Digest of the matchups and standings each season's counts are
+        built from.
+
+        Args:
+            seasons (list[int]): Seasons to stamp
+
+        Returns:
+            dict: season -> digest
+        """
+
+        sha = {season: hashlib.sha256() for season in seasons}
+
+        for name, (keys, values) in self.SOURCE_COLUMNS.items():
+
+            df = getattr(self.store, name)
+            df = df.loc[df["season"].isin(seasons), ["season", *keys, *values]]
+
+            # Normalize the types, which differ between CSV and snapshot
+            df = df.astype({
+                column: str if column == "manager" else float
+                for column in df.columns if column != "season"
+                })
+            df = df.sort_values(["season", *keys])
+
+            hashes = pd.util.hash_pandas_object(df, index=False)
+
+            for season, season_hashes in hashes.groupby(df["season"]):
+                sha[season].update(season_hashes.to_numpy().tobytes())
+
+        return {season: digest.hexdigest() for season, digest in sha.items()}
+
+    def counts(self, seasons: list) -> pd.DataFrame:
+        """Record counts of finished seasons, from the cache where
+        possible. Seasons missing from the cache, or whose matchups or
+        standings changed since they were counted, are counted and cached.
+        """
+
+        stamps = self.season_stamps(seasons)
+
+        cached = pd.DataFrame(
+            columns=["season", *RECORD_KEYS, *self.COUNT_COLUMNS, "source"],
+            )
+
+        if self.cache_path.exists():
+            cached = pd.read_csv(self.cache_path, dtype={"source": str})
+            cached = cached[
+                cached["source"] == cached["season"].map(stamps)
+                ]
+
+        missing = sorted(set(seasons) - set(cached["season"]))
+
+        if missing:
+
+            counted = self.count(missing)
+            counted["source"] = counted["season"].map(stamps)
+
+            frames = [df for df in (cached, counted) if not df.empty]
+            if frames:
+                cached = pd.concat(frames, ignore_index=True)
+
+            tmp_path = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+            cached.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, self.cache_path)
+
+        return cached[cached["season"].isin(seasons)]
+
+    def table(self, counts: pd.DataFrame) -> pd.DataFrame:
+        """Conditional odds of every record.
+
+        Args:
+            counts (pd.DataFrame): Record counts of finished seasons
+
+        Returns:
+            pd.DataFrame: RECORD_KEYS, COUNT_COLUMNS (summed over seasons),
+                p_champion and p_playoffs
+        """
+
+        df = counts.groupby(RECORD_KEYS)[self.COUNT_COLUMNS].sum() \
+            .reset_index()
+
+        df["p_champion"] = df["champions"] / df["managers"]
+        df["p_playoffs"] = df["playoffs"] / df["managers"]
+
+        return df
+
+    def update(self) -> pd.DataFrame:
+        """Rebuild the odds table, and the odds of the season in progress,
+        and write them to championship-odds.json and current-odds.json.
+
+        Returns:
+            pd.DataFrame: The odds table
+        """
+
+        seasons = [int(season) for season in self.store.matchups["season"]
+                   .unique()]
+
+        closed = [season for season in seasons if is_season_closed(season)]
+        current = [season for season in seasons if season not in closed]
+
+        df = self.table(self.counts(closed))
+
+        self.web.write("championship-odds", df)
+
+        if current:
+            df_current = self.current(current, df)
+            self.web.write("current-odds", df_current)
+
+        return df
+
+    def current(self, seasons: list, df: pd.DataFrame) -> pd.DataFrame:
+        """Odds of every manager of seasons in progress, given their latest
+        record.
+
+        Args:
+            seasons (list[int]): Seasons in progress
+            df (pd.DataFrame): Odds table
+
+        Returns:
+            pd.DataFrame: season, manager, RECORD_KEYS, p_champion and
+                p_playoffs (missing for records never seen before)
+        """
+
+        matchups = self.store.matchups
+        records = cumulative_records(
+            matchups[matchups["season"].isin(seasons)]
+            )
+        records = records.groupby(["season", "manager"], sort=False).tail(1)
+
+        return records.merge(
+            df[[*RECORD_KEYS, "p_champion", "p_playoffs"]],
+            on=RECORD_KEYS,
+            how="left",
+            )
@@ -15,6 +15,11 @@ from matplotlib.lines import Line2D
 from statsmodels.formula.api import ols
 from collections import defaultdict
 
+from src.dataset import read_dataset
+from src.lineup import lineup_outcomes
+from src.store import LeagueStore
+from src.webdata import WebData
+
 
 class Plotting:
     """Create plots using data extracted via Query. Save plot artifacts to the
@@ -25,20 +30,27 @@ class Plotting:
     PLOTS_DIR = Path(__file__).parent.parent / "assets" / "plots"
     DATA_DIR = Path(__file__).parent.parent / "data"
 
-    def __init__(self):
+    def __init__(self, store: LeagueStore = None, web: WebData = None):
         """Initializes and instance of the Plotting class.
 
-        Loads in all the data from the data directory
+        Loads in all the data from the data directory, through the shared
+        LeagueStore if one is given.
+
+        Args:
+            store (LeagueStore): League datasets shared between stages
+            web (WebData): Writer of the _data outputs
         """
 
         self.PLOTS_DIR.mkdir(parents=True, exist_ok=True)
 
-        self.df = pd.read_csv(self.DATA_DIR / 'data.csv')
-        self.df['point_diff'] = self.df['points'] - self.df['proj_points']
+        self.store = store or LeagueStore(self.DATA_DIR)
+        self.web = web or WebData()
+
+        self.df = self.store.matchups
 
-        self.df_standings = pd.read_csv(self.DATA_DIR / 'standings.csv')
+        self.df_standings = self.store.standings
 
-        self.df_trades = pd.read_csv(self.DATA_DIR / 'transactions.csv')
+        self.df_trades = self.store.trades
 
         min_season = min(self.df["season"].unique())
         max_season = max(self.df["season"].unique())
@@ -49,11 +61,11 @@ class Plotting:
         Create a heatmap based on matchup scores. Unique scores only
         occuring once are a 'scorigami'
         """
-        df = self.df
-
-        # Round scores
-        df["points_r"] = df["points"].round().astype(int)
-        df["opp_points_r"] = df["opp_points"].round().astype(int)
+        # Round scores, leaving the shared frame untouched
+        df = self.df.assign(
+            points_r=self.df["points"].round().astype(int),
+            opp_points_r=self.df["opp_points"].round().astype(int),
+            )
 
         # Keep only winning matchups
         winners = df[df["points"] > df["opp_points"]]
@@ -127,7 +139,7 @@ class Plotting:
 
         # Calculate the average difference per manager
         avg_diff_sorted = (
-            self.df.groupby('manager')['point_diff']
+            self.df.groupby('manager', observed=True)['point_diff']
             .mean()
             .reset_index()
             .sort_values(by='point_diff', ascending=False)
@@ -197,75 +209,30 @@ class Plotting:
 
         managers = sorted(df['manager'].unique())
 
-        matchup_data = []
-        annot_data = []
-
-        for manager in managers:
-
-            win_pct = {}
-
-            for opponent in managers:
-
-                # If self-matchup:
-                if manager == opponent:
-                    matchup_data.append([manager, opponent, float('nan')])
-                    annot_data.append([manager, opponent, ""])
-                    continue
-
-                # Filter for the specific manager vs. opponent matchups
-                matchup_df = df[
-                    (df['manager'] == manager) &
-                    (df['opponent'] == opponent)
-                ].copy()
-
-                if not matchup_df.empty:
-                    wins = len(
-                        matchup_df[matchup_df['points'] >
-                                   matchup_df['opp_points']]
-                        )
-
-                    losses = len(
-                        matchup_df[matchup_df['points'] <
-                                   matchup_df['opp_points']]
-                        )
-
-                    record = f"({wins}-{losses})"
-
-                    win_pct[opponent] = wins / (wins + losses)
-
-                    avg_delta = matchup_df['point_diff'].mean()
-
-                    # Annotations info
-                    matchup_data.append([manager, opponent, avg_delta])
-                    annot_data.append(
-                        [manager, opponent, f"{record}\n{avg_delta:.2f}"]
-                        )
-                else:
-                    matchup_data.append([manager, opponent, float('nan')])
-                    annot_data.append([manager, opponent, ""])
-
-            rival = min(win_pct, key=win_pct.get)
-            patsy = max(win_pct, key=win_pct.get)
+        h2h = self.store.head_to_head
 
+        for manager, row in h2h.rivals().iterrows():
             print(manager)
-            print(f"\tRival: {rival} ({win_pct[rival]:0.2f})")
-            print(f"\tPatsy: {patsy} ({win_pct[patsy]:0.2f})")
+            print(f"\tRival: {row['rival']} ({row['rival_win_pct']:0.2f})")
+            print(f"\tPatsy: {row['patsy']} ({row['patsy_win_pct']:0.2f})")
 
-        # Create DataFrames and pivot for the heatmap
-        matchup_df_for_heatmap = pd.DataFrame(
-            matchup_data, columns=['Manager', 'Opponent', 'Avg. Delta']
-            )
-        heatmap_data = matchup_df_for_heatmap.pivot(
-            index='Manager', columns='Opponent', values='Avg. Delta'
-            )
+        view = h2h.view()
 
-        annot_df_for_heatmap = pd.DataFrame(
-            annot_data, columns=['Manager', 'Opponent', 'Annotation']
-            )
-        annot_data_pivoted = annot_df_for_heatmap.pivot(
-            index='Manager', columns='Opponent', values='Annotation'
+        annotations = (
+            "(" + view["wins"].astype(str) + "-" +
+            view["losses"].astype(str) + ")\n" +
+            view["avg_proj_delta"].map("{:.2f}".format)
             )
 
+        # Pivot for the heatmap, with every manager on both axes
+        heatmap_data = view["avg_proj_delta"].unstack("opponent").reindex(
+            index=managers, columns=managers,
+            ).rename_axis(index="Manager", columns="Opponent")
+
+        annot_data_pivoted = annotations.unstack("opponent").reindex(
+            index=managers, columns=managers,
+            ).fillna("")
+
         # Calculate the largest absolute delta to set vmin and vmax
         max_abs_delta = heatmap_data.abs().max().max()
 
@@ -596,7 +563,7 @@ class Plotting:
         plt.close()
 
         # Calculate the cumulative points for and against for each manager
-        cumulative_df = df.groupby('manager').agg(
+        cumulative_df = df.groupby('manager', observed=True).agg(
             cumulative_pf=('pf', 'sum'),
             cumulative_pa=('pa', 'sum')
         ).reset_index()
@@ -785,7 +752,8 @@ class Plotting:
         df_standings = self.df_standings
 
         # Calculate cumulative stats for each manager
-        cumulative_df = df_standings.groupby('manager').agg({
+        cumulative_df = df_standings.groupby(
+            'manager', observed=True).agg({
             'pf': 'sum',
             'pa': 'sum',
             'wins': 'sum',
@@ -895,11 +863,11 @@ class Plotting:
 
         # Calculate the average rank for each manager
         avg_seed = (
-            df.groupby('manager')['seed'].mean()
+            df.groupby('manager', observed=True)['seed'].mean()
             .reset_index().sort_values(by='seed')
         )
         avg_rank = (
-            df.groupby('manager')['rank'].mean()
+            df.groupby('manager', observed=True)['rank'].mean()
             .reset_index().sort_values(by='rank')
         )
 
@@ -979,7 +947,8 @@ class Plotting:
         TODO: This plot is better served as an interactive plot.
         """
 
-        df = self.df
+        # Outcome columns are added to a copy, not to the shared frame
+        df = self.df.copy()
 
         threshold = 10
 
@@ -1019,7 +988,7 @@ class Plotting:
             (df['actual_outcome'] == 'loss')).astype(int)
 
         # Calculate total upsets for each manager
-        upset_summary = df.groupby('manager').agg(
+        upset_summary = df.groupby('manager', observed=True).agg(
             upset_victories=('upset_victory', 'sum'),
             upset_losses=('upset_loss', 'sum')
         ).reset_index()
@@ -1159,7 +1128,7 @@ class Plotting:
 
     def plot_draft_cost_points(self):
 
-        df = pd.read_csv(self.DATA_DIR / 'draft_results.csv')
+        df = self.store.draft_results
 
         plt.figure(figsize=(8, 6))
         sns.scatterplot(x='player_cost', y='points', data=df)
@@ -1288,7 +1257,7 @@ class Plotting:
             s = df[df["manager"] == manager]
 
             for k, row in s.iterrows():
-                roster = eval(row["roster"])
+                roster = self.store.rosters.entries(k)
                 # print(roster)
 
                 for r in roster:
@@ -1311,7 +1280,7 @@ class Plotting:
                 pts_by_ros = defaultdict(int)
 
                 for k, row in t.iterrows():
-                    roster = eval(row["roster"])
+                    roster = self.store.rosters.entries(k)
 
                     for r in roster:
                         pts_by_ros[r[2]] += r[3]
@@ -1326,8 +1295,7 @@ class Plotting:
                     js.append(entry)
         print(js)
 
-        with open("_data/rosters.json", "w") as f:
-            json.dump(js, f, indent=3)
+        self.web.write("rosters", js)
 
         custom_order = [
             'QB', 'RB', 'WR', 'TE', 'W/R/T', 'W/T', 'DEF', 'K', 'BN', 'IR'
@@ -1552,103 +1520,49 @@ class Plotting:
         plt.close()
 
     def plot_optimum_lineup(self):
-        """
+        """Plot, per manager, the weeks of optimal lineups, the squandered
+        bench points, and the losses an optimal lineup would have won.
+
+        Optimal lineups are solved exactly (see lineup.py) when the data is
+        saved, so this only compares the materialized columns.
         """
 
         df = self.df
 
-        mx = -1e9
-        mx_str = ""
-
-        sqr_pts_sum = 0.0
-        total_w = 0
-
-        m = defaultdict(lambda: {'opt_cnt': 0, 'sqr_pts': 0.0, 'flips': 0})
-
-        for k, row in df.iterrows():
-
-            roster = eval(row['roster'])
-            s_roster = sorted(roster, key=lambda item: item[3], reverse=True)
-
-            # print(roster)
-            # print()
-            # print(s_roster)
-            # exit(0)
-
-            manager = row['manager']
-            week = row['week']
-            season = row['season']
-
-            starters = []
-            bench = []
-            optimum = []
-            slots = []
-
-            pts = 0
-            opt_pts = 0
-
-            for r in roster:
-                if r[2] == 'BN' or r[2] == 'IR':
-                    bench.append(r)
-                else:
-                    starters.append(r)
-                    slots.append(r[2])
-                    pts += r[3]
-
-            for s in slots:
-                kp = None
-                for k, p in enumerate(s_roster):
-                    if (
-                        # Roster slot position matches player position
-                        (s == p[4]) or
-                        # Elseif is full FLEX
-                        (s == "W/R/T" and (
-                            p[4] == "WR" or p[4] == "RB" or p[4] == "TE")) or
-                        # Elseif is WR or TE
-                        (s == "W/T" and (p[4] == "WR" or p[4] == "TE"))
-                    ):
-                        kp = k
-                        opt_pts += p[3]
-                        break
-
-                optimum.append(s_roster.pop(kp))
-
-            # print(f"{manager}: Week {week} {season} | {pts} vs {opt_pts}")
-
-            # DEBUG
-            # Sanity check sum of player points vs. team scores
-            # if round(pts, 2) != round(row['points'], 2):
-            #     print("Points Mismatch")
-            #     print(
-            #         f"{manager}: Week {week} {season} - "
-            #         f"{pts:0.2f} {row['points']:0.2f}\n"
-            #         )
-
-            if pts == opt_pts:
-                # print(
-                #     f"{manager}: Week {week} {season} - "
-                #     f"Optimum Lineup {opt_pts:0.2f} pts"
-                #     )
-                m[manager]['opt_cnt'] += 1
-
-            else:
-                sqr_pts = opt_pts - pts
-                m[manager]['sqr_pts'] += sqr_pts
-
-                # Manual trivia extraction here
-                if sqr_pts > mx and manager == "Chris":
-                    mx = sqr_pts
-                    mx_str = f"{manager}: Week {week} {season} | {opt_pts} pts"
+        df_lineups = lineup_outcomes(
+            df["starter_points"], df["opt_points"], df["opp_points"],
+            )
+        df_lineups["manager"] = df["manager"].to_numpy()
+        df_lineups["week"] = df["week"].to_numpy()
+        df_lineups["season"] = df["season"].to_numpy()
 
-                sqr_pts_sum += sqr_pts
+        # Manual trivia extraction here
+        trivia = df_lineups[
+            ~df_lineups["is_optimal"] & (df_lineups["manager"] == "Chris")
+            ]
 
-                if opt_pts > row['opp_points'] and pts < row['opp_points']:
-                    m[manager]['flips'] += 1
+        mx = -1e9
+        mx_str = ""
 
-            total_w += 1
+        if not trivia.empty:
+            row = trivia.loc[trivia["squandered_points"].idxmax()]
+            mx = row["squandered_points"]
+            mx_str = (
+                f"{row['manager']}: Week {row['week']} {row['season']} | "
+                f"{row['opt_points']} pts"
+                )
 
         print(f"{mx_str} {mx} pts")
-        print(f"{sqr_pts_sum / total_w} {total_w}")
+        print(
+            f"{df_lineups['squandered_points'].sum() / len(df_lineups)} "
+            f"{len(df_lineups)}"
+            )
+
+        m = df_lineups.groupby("manager", sort=False, observed=True).agg(
+            opt_cnt=("is_optimal", "sum"),
+            sqr_pts=("squandered_points", "sum"),
+            flips=("flip", "sum"),
+            ).to_dict("index")
 
         # Create a list of (category, count) tuples
         data_pairs = [(key, data['opt_cnt']) for key, data in m.items()]
@@ -1780,7 +1694,7 @@ class Plotting:
 
         for k, df_row in df.iterrows():
 
-            roster = eval(df_row["roster"])
+            roster = self.store.rosters.entries(k)
 
             manager = df_row["manager"]
             opp_manager = df_row["opponent"]
@@ -1942,126 +1856,95 @@ class Plotting:
         print(t_str)
 
     def plot_monday_comebacks(self):
-        """
+        """Find matchups decided by a single Monday night starter, i.e.
+        where the manager had one starter left on Monday and the opponent
+        none.
         """
 
         df = self.df
 
-        count = 0
-        count2 = 0
-        count3 = 0
-        count4 = 0
-
-        count2_sum = 0
-
-        manager_counts = defaultdict(int)
-        manager_opportunities = defaultdict(int)
-        manager_needed = defaultdict(lambda: 1e9)
-        manager_needed_s = dict()
-        loser_counts = defaultdict(int)
-        pos_counts = defaultdict(int)
-
         th_pts = 0
 
-        max_win = -1e9
-        min_win = 1e9
-
         managers = df['manager'].unique()
 
         total_matchups = df.shape[0] >> 1
 
-        for k, row in df.iterrows():
-
-            monday_players = []
-            num_monday_players_opp = 0
-
-            roster = eval(row["roster"])
-
-            season = row["season"]
-            week = row["week"]
-            manager = row["manager"]
-            opponent = row["opponent"]
-            pts = row["points"]
-            opp_pts = row["opp_points"]
-
-            opp_row = df[
-                (df["season"] == season) &
-                (df["week"] == week) &
-                (df["manager"] == opponent) &
-                (df["opponent"] == manager)
-            ].reset_index()
-
-            opp_roster = eval(opp_row.loc[0, "roster"])
-
-            for r in roster:
-                day = r[5]
-
-                active = True
-
-                if r[2] == "BN" or r[2] == "IR":
-                    active = False
-
-                if day == "Monday" and active:
-                    monday_players += [r]
-
-            for r in opp_roster:
-                day = r[5]
-
-                active = True
+        # Both sides of each matchup
+        df = df.assign(
+            opp_starters_monday=self.store.pairs["opp_starters_monday"],
+            )
 
-                if r[2] == "BN" or r[2] == "IR":
-                    active = False
+        candidates = df[
+            (df["starters_monday"] == 1) & (df["opp_starters_monday"] == 0)
+            ]
 
-                if day == "Monday" and active:
-                    num_monday_players_opp += 1
+        # The single Monday starter of each candidate
+        players = self.store.rosters.to_frame()
+        monday = players[
+            ~players["slot"].isin(["BN", "IR"]) &
+            (players["weekday"] == "Monday") &
+            players["row"].isin(candidates.index)
+            ].set_index("row").reindex(candidates.index)
 
-            if len(monday_players) == 1 and num_monday_players_opp == 0:
-                count += 1
+        count = len(candidates)
 
-                monday_pts = monday_players[0][3]
-                r = monday_players[0]
+        needed = candidates["opp_points"] - (
+            candidates["points"] - monday["points"]
+            )
 
-                if (pts - monday_pts) + th_pts < opp_pts:
-                    count2 += 1
-                    count2_sum += opp_pts - (pts - monday_pts)
+        behind = (candidates["points"] - monday["points"]) + th_pts < \
+            candidates["opp_points"]
 
-                    manager_opportunities[manager] += 1
+        count2 = int(behind.sum())
+        count2_sum = needed[behind].sum()
 
-                    needed = opp_pts - (pts - monday_pts)
+        won = behind & (candidates["points"] > candidates["opp_points"])
+        count4 = int(won.sum())
 
-                    s = (
-                        f"Week {week:2d} {season} | "
-                        f"{manager} ({pts}) vs. {opponent} ({opp_pts}) | "
-                        f"{r[0]} ({r[1]} - {r[4]}): {r[3]:0.2f} pts "
-                        f"(needed: {needed:0.2f})"
-                    )
+        descriptions = {}
 
-                    if pts > opp_pts:
+        for k in candidates.index[behind]:
+            row = candidates.loc[k]
+            r = monday.loc[k]
 
-                        count4 += 1
-                        print(s)
-                        print()
+            descriptions[k] = (
+                f"Week {row['week']:2d} {row['season']} | "
+                f"{row['manager']} ({row['points']}) vs. "
+                f"{row['opponent']} ({row['opp_points']}) | "
+                f"{r['name']} ({r['nfl_team']} - {r['position']}): "
+                f"{r['points']:0.2f} pts "
+                f"(needed: {needed[k]:0.2f})"
+                )
 
-                        if pts - opp_pts < min_win:
-                            min_s = s
-                            min_win = pts - opp_pts
+            if won[k]:
+                print(descriptions[k])
+                print()
 
-                        if needed > max_win:
-                            max_s = s
-                            max_win = needed
+        comebacks = candidates[won]
+        margin = comebacks["points"] - comebacks["opp_points"]
 
-                        manager_counts[manager] += 1
-                        loser_counts[opponent] += 1
-                        pos_counts[monday_players[0][4]] += 1
+        min_s = descriptions.get(margin.idxmin()) if count4 else None
+        min_win = margin.min() if count4 else 1e9
+        max_s = descriptions.get(needed[won].idxmax()) if count4 else None
+        max_win = needed[won].max() if count4 else -1e9
 
-                    else:
+        def counts(series: pd.Series) -> dict:
+            return series.astype(object).value_counts(sort=False).to_dict()
 
-                        if needed < manager_needed[manager]:
-                            manager_needed[manager] = needed
-                            manager_needed_s[manager] = s
+        manager_counts = counts(comebacks["manager"])
+        manager_opportunities = counts(candidates.loc[behind, "manager"])
+        loser_counts = counts(comebacks["opponent"])
+        pos_counts = counts(monday.loc[won, "position"])
 
-                else:
-                    count3 += 1
+        # Closest miss of each manager
+        misses = needed[behind & ~won]
+        manager_needed_s = {
+            manager: descriptions[k]
+            for manager, k in misses.groupby(
+                candidates.loc[misses.index, "manager"].astype(object),
+                sort=False,
+                ).idxmin().items()
+            }
 
         print(f"Matchups with 1 player remaining on Monday: {count} / {total_matchups} | ({100 * count / total_matchups:0.2f}%)")
         print(f"and where manager is behind by {th_pts} or more pts: {count2} ({count2_sum / count2:0.2f} pts avg.)")
@@ -2084,7 +1967,7 @@ class Plotting:
 
         for m in managers:
             print(m)
-            print(manager_needed_s[m])
+            print(manager_needed_s.get(m))
             print()
 
     def plot_cmc(self):
@@ -2126,7 +2009,7 @@ class Plotting:
 
             cmc_pts = 0
 
-            roster = eval(row["roster"])
+            roster = self.store.rosters.entries(k)
 
             margin = row["points"] - row["opp_points"]
 
@@ -2211,7 +2094,7 @@ class Plotting:
             if manager != "Keara":
                 continue
 
-            roster = eval(row['roster'])
+            roster = self.store.rosters.entries(k)
 
             qbs = []
             bn_pts = 0
@@ -2256,25 +2139,31 @@ class Plotting:
 
         season = 2025
 
-        df = self.df[self.df["season"] == season]
+        # Only the season's partition is read
+        df = read_dataset(
+            self.store.data_dir,
+            "player_weeks",
+            seasons=[season],
+            columns=[
+                "week", "manager", "player", "nfl_team", "slot", "points",
+                "position", "weekday",
+                ],
+            )
+        df = df[df["position"].isin(["WR", "RB", "TE"])]
 
-        mx = -1e9
         s = []
 
-        for k, row in df.iterrows():
-
-            manager = row["manager"]
-            week = row["week"]
-
-            roster = eval(row['roster'])
-
-            for r in roster:
-
-                if r[4] == "WR" or r[4] == "RB" or r[4] == "TE":
-
-                    if r[3] > mx:
-                        mx = r[3]
-                        s = f"Week {week} | {manager} | {r}"
+        if len(df):
+            row = df.loc[df["points"].idxmax()]
+            r = (
+                row["player"],
+                row["nfl_team"],
+                row["slot"],
+                float(row["points"]),
+                row["position"],
+                row["weekday"],
+                )
+            s = f"Week {row['week']} | {row['manager']} | {r}"
 
         print(s)
 
@@ -4,19 +4,63 @@ import json
 import pandas as pd
 import nflreadpy
 
-from collections import defaultdict
+from collections import Counter, defaultdict
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    )
 from pathlib import Path
-from random import uniform
-from time import sleep
 from tqdm import tqdm
 
+from yfpy.exceptions import YahooFantasySportsDataNotFound
 from yfpy.query import YahooFantasySportsQuery
-from yfpy.models import Team, Player
+from yfpy.models import Matchup, Team, Player
 
+from src.cache import CachedQuery, PlayerMetadataCache, is_season_closed
+from src.checkpoint import Checkpoint, TransactionLog
+from src.dataset import MatchupWriter, read_player_weeks
+from src.lookups import PlayerIndex, ScheduleIndex
+from src.managers import ManagerDimension
+from src.ratelimit import RateLimitedQuery, SharedTokenBucket, TokenBucket
+from src.records import MatchupRecord, roster_entry
+from src.store import LeagueStore
+from src.warehouse import Warehouse
+from src.webdata import WebData
 
-def query_delay():
-    # sleep(random()*Query.API_DELAY_SLEEP_MAX_SEC)
-    sleep(uniform(1.0, Query.API_DELAY_SLEEP_MAX_SEC))
+
+# Request budget shared by all backfill worker processes
+_backfill_limiter = None
+
+
+def _init_backfill_worker(limiter: SharedTokenBucket):
+    global _backfill_limiter
+    _backfill_limiter = limiter
+
+
+def _backfill_season(season: int, settings: dict) -> dict:
+    """Query and parse a single season inside a backfill worker process.
+
+    Matchup records are written to the season's checkpoint by the worker.
+    The remaining parsed data is returned as plain (picklable) containers,
+    to be merged by the parent Query.
+    """
+
+    q = Query()
+    q.limiter = _backfill_limiter
+
+    for name, value in settings.items():
+        setattr(q, name, value)
+
+    q.season = season
+    query = q.run_query(season)
+    q.parse_query(query)
+
+    return {
+        "league": q.leagues[season],
+        "standings": dict(q.standings_map[season]),
+        "draft_results": q.draft_results,
+    }
 
 
 class Query:
@@ -28,7 +72,19 @@ class Query:
     and other league metadata.
     """
 
-    API_DELAY_SLEEP_MAX_SEC = 20.255
+    # Shared Yahoo API request budget. The rate adapts downwards whenever
+    # Yahoo reports throttling, and recovers as requests succeed.
+    API_RATE_PER_SEC = 1.0
+    API_BURST = 5
+
+    # Number of concurrent workers issuing Yahoo API requests
+    API_MAX_WORKERS = 4
+
+    # Number of team rosters retrieved per batched API request
+    ROSTER_BATCH_SIZE = 12
+
+    # Number of league transactions retrieved per API request
+    TRANSACTIONS_PAGE_SIZE = 25
 
     SEASONS_RANGE = range(2018, 2025+1)
 
@@ -45,28 +101,43 @@ class Query:
 
         self.DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-        # TODO: Remove in favor of the caching approach
-        self.managers_record_map = defaultdict(  # season
-            lambda: defaultdict(  # week
-                lambda: defaultdict(dict)  # manager -> data entries
-                )
-            )
+        # Seasons whose matchups are assembled into the dataset. Matchup
+        # records themselves are streamed to the per-season checkpoints.
+        self.seasons = []
 
         self.standings_map = defaultdict(  # season
                 lambda: defaultdict(dict)  # manager -> data entries
             )
 
-        self.transactions_map = defaultdict(list)
-
         self.draft_results = []
 
+        self.player_cache = PlayerMetadataCache()
+
+        self.managers = ManagerDimension()
+
+        self.web = WebData()
+
         self.query_draft_flag = False
         self.query_matchups_flag = False
         self.query_transactions_flag = False
 
+        # Parse entirely from previously cached API responses
+        self.replay_flag = False
+
+        # Skip (season, week, manager) units checkpointed by a previous run
+        self.resume_flag = True
+
+        # Also load the saved data into the indexed SQLite warehouse
+        self.warehouse_flag = False
+
         self.league_name = None
         self.season = None
 
+        # Name of the league each parsed season belongs to
+        self.leagues = {}
+
+        self.limiter = TokenBucket(self.API_RATE_PER_SEC, self.API_BURST)
+
     def run_query(self, season: int):
         """Initializes and returns a Yahoo Fantasy Sports API query object for
         a specific season (year).
@@ -78,19 +149,38 @@ class Query:
         Args:
             season (int): The NFL season for which to generate the query.
 
+        All API calls made through the returned object share the
+        rate limiter of this Query instance, and are served from the on-disk
+        response cache for closed seasons. In replay mode, no connection to
+        Yahoo is made at all and every call must be served from the cache.
+
         Returns:
             YahooFantasySportsQuery: An initialized query object.
         """
 
-        query = YahooFantasySportsQuery(
-            league_id="######",
-            game_code="nfl"
+        if self.replay_flag:
+            self.league_name, league_id, game_id = CachedQuery.find_league(
+                season, self.league_name,
+                )
+            return CachedQuery(
+                None, season, offline=True,
+                league_id=league_id, game_id=game_id,
+                )
+
+        query = CachedQuery(
+            RateLimitedQuery(
+                YahooFantasySportsQuery(
+                    league_id="######",
+                    game_code="nfl"
+                    ),
+                self.limiter,
+                ),
+            season,
             )
 
         game_id = query.get_game_key_by_season(season)
 
         leagues = query.get_user_leagues_by_game_key(game_id)
-        query_delay()
 
         if self.league_name is None:
             if len(leagues) > 1:
@@ -124,13 +214,22 @@ class Query:
             league_id = league[league_k].league_id
             # raise ValueError(f"No league_id found for {season}")
 
-        query = YahooFantasySportsQuery(
-                league_id=league_id,
-                game_id=game_id,
-                game_code="nfl",
-                all_output_as_json_str=False
+        query = CachedQuery(
+            RateLimitedQuery(
+                YahooFantasySportsQuery(
+                    league_id=league_id,
+                    game_id=game_id,
+                    game_code="nfl",
+                    all_output_as_json_str=False
+                    ),
+                self.limiter,
+                ),
+            season,
+            league_id=league_id,
+            game_id=game_id,
             )
-        query_delay()
+
+        query.record_league(self.league_name, league_id, game_id)
 
         return query
 
@@ -143,100 +242,226 @@ class Query:
         method extracts seasonal, weekly matchup results, and other
         manager data to store in local databases.
 
+        The standings, scoreboard, and roster requests are fanned out across
+        a pool of `API_MAX_WORKERS` threads, paced by the shared rate limiter.
+
+        Each parsed (week, manager) record is checkpointed as it completes,
+        rather than held in memory.
+        Units from final weeks that were checkpointed by a previous run are
+        not fetched again, so a refresh of the in-progress season only
+        touches the weeks that are new (or still being played).
+
         Args:
             query (YahooFantasySportsQuery): The YahooFantasySportsQuery query
         """
 
         league_info = query.get_league_metadata()
-        query_delay()
 
         season = league_info.season
 
         if league_info.season != self.season:
             raise RuntimeError("Season mismatch")
 
-        standings = query.get_league_standings().teams
-        query_delay()
+        self.leagues[season] = league_info.name
 
         if self.query_draft_flag:
             self.parse_draft_results(query)
 
         if self.query_transactions_flag:
-            # self.parse_transactions(query)
-            raise NotImplementedError("Transaction parsing not implemented.")
-
-        for team in standings:
-
-            manager = team.managers[0].nickname
+            self.parse_transactions(query)
 
-            if manager == "--hidden--":
-                print(team)
-                raise RuntimeError("Manager nickname not found.")
+        # Resume from the units completed by any previous (interrupted) run
+        self.checkpoint = Checkpoint(season)
 
-            self.standings_map[season][manager]["pf"] = team.points_for
-            self.standings_map[season][manager]["pa"] = team.points_against
-            self.standings_map[season][manager]["rank"] = team.rank
-            self.standings_map[season][manager]["seed"] = team.playoff_seed
-            self.standings_map[season][manager]["wins"] = team.wins
-            self.standings_map[season][manager]["losses"] = team.losses
+        if not self.resume_flag:
+            self.checkpoint.reset()
 
-        # Get the season-long player roster for additional player metrics
-        # not available through YFPY
-        self.weekly_roster = nflreadpy.load_rosters_weekly(season)
-        self.weekly_roster = self.weekly_roster.to_pandas()
+        done = self.checkpoint.done()
 
-        self.sched = nflreadpy.load_schedules(season).to_pandas()
+        # Weeks prior to the current week are final, as is every week of a
+        # finished season. Only final weeks are skipped on a resume.
+        self.last_final_week = league_info.current_week
+        if not league_info.is_finished:
+            self.last_final_week -= 1
 
         # Dynamically loop to the most recent week of the season
         # i.e. championship week for completed seasons, and
-        # current week for present season
-        for week in tqdm(range(1, league_info.current_week+1),
-                         desc="Week".ljust(self.TQDM_WIDTH),
-                         leave=False,
-                         position=1):
-
-            scoreboard = query.get_league_scoreboard_by_week(week)
-            query_delay()
-
-            if scoreboard is None:
-                raise RuntimeError(
-                    f"No scoreboard data for Week {week} {season}."
-                    )
+        # current week for present season. Weeks where every team has
+        # already been checkpointed don't need a scoreboard fetch.
+        num_done = Counter(week for week, _ in done)
+
+        weeks = [
+            week for week in range(1, league_info.current_week+1)
+            if num_done[week] < int(league_info.num_teams)
+            ]
 
-            for matchup_data in tqdm(scoreboard.matchups,
-                                     leave=False,
-                                     desc="Matchup".ljust(self.TQDM_WIDTH),
-                                     position=2):
+        with ThreadPoolExecutor(max_workers=self.API_MAX_WORKERS) as pool:
 
-                team1_data = matchup_data.teams[0]
-                team2_data = matchup_data.teams[1]
+            # Fan out the standings and all weekly scoreboards up front. The
+            # shared rate limiter paces the requests across the workers.
+            standings_future = pool.submit(query.get_league_standings)
 
-                if matchup_data.is_tied:
-                    raise NotImplementedError("Tie handling not implemented.")
+            scoreboard_futures = [
+                pool.submit(query.get_league_scoreboard_by_week, week)
+                for week in weeks
+                ]
 
-                mrm = self.managers_record_map[season][week]
+            # Get the season-long player roster for additional player metrics
+            # not available through YFPY
+            self.weekly_roster = nflreadpy.load_rosters_weekly(season)
+            self.weekly_roster = self.weekly_roster.to_pandas()
+            self.player_index = PlayerIndex(self.weekly_roster)
 
-                t1_mgr = team1_data.managers[0].nickname
-                t2_mgr = team2_data.managers[0].nickname
+            self.sched = nflreadpy.load_schedules(season).to_pandas()
+            self.schedule = ScheduleIndex(self.sched, season)
 
-                mrm[t1_mgr]["is_playoffs"] = matchup_data.is_playoffs
-                mrm[t1_mgr]["is_consolation"] = matchup_data.is_consolation
+            standings = standings_future.result().teams
 
-                mrm[t2_mgr]["is_playoffs"] = matchup_data.is_playoffs
-                mrm[t2_mgr]["is_consolation"] = matchup_data.is_consolation
+            for team in standings:
 
-                self.extract_matchup_data(
-                    mrm, team1_data, team2_data, query, week
-                    )
-                self.extract_matchup_data(
-                    mrm, team2_data, team1_data, query, week
-                    )
+                manager = team.managers[0].nickname
+
+                if manager == "--hidden--":
+                    print(team)
+                    raise RuntimeError("Manager nickname not found.")
+
+                stm = self.standings_map[season][manager]
+
+                stm["pf"] = team.points_for
+                stm["pa"] = team.points_against
+                stm["rank"] = team.rank
+                stm["seed"] = team.playoff_seed
+                stm["wins"] = team.wins
+                stm["losses"] = team.losses
+
+            week_futures = []
+
+            for week, scoreboard_future in zip(weeks, scoreboard_futures):
+
+                scoreboard = scoreboard_future.result()
+
+                if scoreboard is None:
+                    raise RuntimeError(
+                        f"No scoreboard data for Week {week} {season}."
+                        )
+
+                pending = []
+
+                for matchup_data in scoreboard.matchups:
+
+                    team1_data = matchup_data.teams[0]
+                    team2_data = matchup_data.teams[1]
+
+                    if matchup_data.is_tied:
+                        raise NotImplementedError(
+                            "Tie handling not implemented."
+                            )
+
+                    for team_data, opp_data in ((team1_data, team2_data),
+                                                (team2_data, team1_data)):
+
+                        manager = team_data.managers[0].nickname
+
+                        if (week, manager) in done:
+                            continue
+
+                        pending.append((matchup_data, team_data, opp_data))
+
+                # The weeks' roster fetches can run concurrently, as every
+                # record is appended to the checkpoint on its own line
+                if pending:
+                    week_futures.append(
+                        pool.submit(
+                            self.extract_week_matchups,
+                            pending, query, week,
+                            )
+                        )
+
+            for future in tqdm(as_completed(week_futures),
+                               total=len(week_futures),
+                               desc="Week".ljust(self.TQDM_WIDTH),
+                               leave=False,
+                               position=1):
+                future.result()
+
+        self.seasons.append(season)
+
+    def get_rosters_by_week(self,
+                            query: YahooFantasySportsQuery,
+                            teams: list,
+                            week: int,
+                            ) -> dict:
+        """Retrieve the rosters, with weekly player stats, of many teams.
+
+        The Yahoo Fantasy API accepts multiple team keys in a single teams
+        collection request, so up to `ROSTER_BATCH_SIZE` teams are fetched
+        per API call instead of one call per team.
+
+        Args:
+            query (YahooFantasySportsQuery): The YahooFantasySportsQuery query
+            teams (list[yfpy.models.Team]): Teams to retrieve rosters for
+            week (int): The week of the season
+
+        Returns:
+            dict: team key -> list[yfpy.models.Player]
+        """
+
+        team_keys = [team.team_key for team in teams]
+
+        rosters = {}
+
+        for k in range(0, len(team_keys), self.ROSTER_BATCH_SIZE):
+
+            batch = ",".join(team_keys[k:k+self.ROSTER_BATCH_SIZE])
+
+            batch_teams = query.query(
+                "https://fantasysports.yahooapis.com/fantasy/v2/"
+                f"teams;team_keys={batch}/roster;week={week}/players/stats",
+                ["teams"],
+                )
+
+            # A single-team collection is returned as {"team": Team}
+            if not isinstance(batch_teams, list):
+                batch_teams = [batch_teams["team"]]
+
+            for team in batch_teams:
+                rosters[team.team_key] = team.players
+
+        return rosters
+
+    def extract_week_matchups(self,
+                              matchups: list,
+                              query: YahooFantasySportsQuery,
+                              week: int
+                              ):
+        """Extracts information for all pending matchups of a given week.
+
+        Rosters for every team are retrieved in batches, and then each
+        (team, opponent) pair is extracted with `extract_matchup_data`.
+
+        Args:
+            matchups (list): (matchup, team, opponent) yfpy.models.Matchup
+                and yfpy.models.Team triples
+            query (YahooFantasySportsQuery): The YahooFantasySportsQuery query
+            week (int): The week of the season
+        """
+
+        rosters = self.get_rosters_by_week(
+            query,
+            [team1 for _, team1, _ in matchups],
+            week,
+            )
+
+        for matchup, team1, team2 in matchups:
+            self.extract_matchup_data(
+                matchup, team1, team2, rosters[team1.team_key], week,
+                )
 
     def extract_matchup_data(self,
-                             mrm_stub: defaultdict,
+                             matchup: Matchup,
                              team1: Team,
                              team2: Team,
-                             query: YahooFantasySportsQuery,
+                             players: list,
                              week: int
                              ):
         """Extracts information for a given weekly matchup.
@@ -246,29 +471,30 @@ class Query:
         This method supports abstraction because each matchup is effectively
         captured as team1 vs. team2 and team2 vs. team1.
 
+        The record is appended to the season's checkpoint, from which the
+        dataset is assembled by `save_weekly_matchups_data`.
+
         Args:
-            mrm_stub (defaultdict): Object to store the extracted data in
+            matchup (yfpy.models.Matchup): The weekly matchup
             team1 (yfpy.models.Team): Manager's team data object
             team2 (yfpy.models.Team): Opponent's team data object
+            players (list[yfpy.models.Player]): Manager's weekly roster,
+                with player stats
+            week (int): The week of the season
         """
 
         team1_manager = team1.managers[0].nickname
         team2_manager = team2.managers[0].nickname
 
-        mrm_stub[team1_manager]["points"] = team1.team_points.total
-        mrm_stub[team1_manager]["proj_points"] = team1.projected_points
-
-        mrm_stub[team1_manager]["opp_points"] = team2.team_points.total
-        mrm_stub[team1_manager]["opp_proj_points"] = team2.projected_points
-        mrm_stub[team1_manager]["opponent"] = team2_manager
-
-        players = query.get_team_roster_player_stats_by_week(
-            team1.team_id,
-            week,
+        record = MatchupRecord(
+            is_playoffs=matchup.is_playoffs,
+            is_consolation=matchup.is_consolation,
+            points=team1.team_points.total,
+            proj_points=team1.projected_points,
+            opp_points=team2.team_points.total,
+            opp_proj_points=team2.projected_points,
+            opponent=team2_manager,
             )
-        query_delay()
-
-        roster = []
 
         for player in players:
 
@@ -278,64 +504,24 @@ class Query:
             # so use a separate dB for a lookup
             player_team, player_pos = self.get_player_team(week, player)
 
-            player_team_tmp = player_team
-
-            if self.season < 2020 and player_team == "LV":
-                player_team_tmp = "OAK"
-
-            if player_team == "LAR":
-                player_team_tmp = "LA"
-
             if player_team == "N/A":
                 week_day = "N/A"
 
             else:
-                teams = pd.concat(
-                    [self.sched["home_team"], self.sched["home_team"]],
-                    )
-                teams = teams.unique()
-
-                week_slice = self.sched[self.sched["week"] == week]
-                week_slice = week_slice.drop(
-                    columns=["game_id", "week", "season", "game_type"],
-                    )
-
-                if player_team_tmp not in teams:
-                    print("\n\n\n")
-                    print(week)
-                    print(team1_manager)
-                    print(week_slice)
-                    print(player.full_name)
-                    print(player_team)
-                    print(player)
-                    raise RuntimeError(
-                        "Failed to identify player-team schedule."
-                        )
+                try:
+                    week_day = self.schedule.week_day(week, player_team)
 
-                sched_slice = week_slice[
-                    (week_slice["home_team"] == player_team_tmp) |
-                    (week_slice["away_team"] == player_team_tmp)
-                ].reset_index()
-
-                # Bye week
-                if sched_slice.shape[0] == 0:
-                    week_day = "BYE"
-                elif sched_slice.shape[0] == 1:
-                    week_day = sched_slice.loc[0, "weekday"]
-                else:
+                except RuntimeError:
                     print("\n\n\n")
                     print(week)
                     print(team1_manager)
-                    print(week_slice)
                     print(player.full_name)
                     print(player_team)
                     print(player)
-                    raise RuntimeError(
-                        "Multipe player-teams found."
-                        )
+                    raise
 
-            roster.append(
-                (
+            record.roster.append(
+                roster_entry(
                     player.full_name,
                     player_team,
                     player.selected_position.position,
@@ -345,7 +531,12 @@ class Query:
                 )
             )
 
-        mrm_stub[team1_manager]["roster"] = roster
+        self.checkpoint.append(
+            week,
+            team1_manager,
+            record.to_dict(),
+            final=week <= self.last_final_week,
+            )
 
     def get_player_team(self, week: int, player: Player):
         """Perform a secondary lookup to get a player's team for a past season.
@@ -353,52 +544,19 @@ class Query:
         YFPY is unable to provide a player's team for historical seasons. The
         team returned is the player's most recent team. This function hooks in
         a secondary library to provide a lookup for a player's team for a
-        given season.
+        given season, via the PlayerIndex built when the season's weekly
+        rosters are loaded.
         """
 
-        wkly_rstr = self.weekly_roster
-
         if player.display_position == "DEF":
             player_team = player.editorial_team_abbr
             player_pos = "DEF"
 
         else:
 
-            # Use Yahoo ID first
-            player_slice = wkly_rstr[
-                (wkly_rstr["yahoo_id"] == f"{player.player_id}")
-                ].reset_index()
-
-            # Else, fallback to str match on full name
-            if player_slice.empty:
-                player_slice = wkly_rstr[
-                    (wkly_rstr["full_name"] == f"{player.full_name}")
-                    ].reset_index()
-
-            first_name = player.first_name
-            last_name_trim = player.last_name.split()[0]
-
-            # Else, fallback to partial match on first and last name
-            if player_slice.empty:
-                player_slice = wkly_rstr[
-                    (wkly_rstr["first_name"] == f"{first_name}") &
-                    (wkly_rstr["last_name"] == f"{last_name_trim}")
-                    ].reset_index()
-
-            # Else, fallback to last name and first initial
-            if player_slice.empty:
-                player_slice = wkly_rstr[
-                    (wkly_rstr["first_name"].str.startswith(
-                        first_name[0])) &
-                    (wkly_rstr["last_name"] == f"{last_name_trim}")
-                    ].reset_index()
-
-            # Else, last name only and position
-            if player_slice.empty:
-                player_slice = wkly_rstr[
-                    (wkly_rstr["position"] == player.primary_position) &
-                    (wkly_rstr["last_name"] == f"{last_name_trim}")
-                    ].reset_index()
+            # Match on Yahoo ID first, then fall back to progressively
+            # looser name matches (see PlayerIndex.TIERS)
+            match = self.player_index.lookup(week, player)
 
             # Retired players that managers drafted anyway
             known_exceptions = [
@@ -412,7 +570,7 @@ class Query:
             # Expectation at this point is that any database mismatches
             # have been resolved, and the current `player` is one of the
             # known exceptions of not having an identifiable team.
-            if player_slice.empty:
+            if match is None:
                 player_team = "N/A"
 
                 found = False
@@ -430,67 +588,135 @@ class Query:
                         )
 
             else:
-                closest_week_index = (
-                    player_slice['week'] - week
-                    ).abs().idxmin()
-
-                player_team = player_slice.loc[
-                    closest_week_index, "team"]
-
-                player_pos = player_slice.loc[
-                    closest_week_index, "position"]
-
-                # print(player_slice)
-                # for x in player_slice.columns:
-                #     print(x)
-                # exit(0)
+                player_team, player_pos = match
 
         if player_team == "OAK":
             player_team = "LV"
 
         return (player_team.upper(), player_pos)
 
-    def parse_transaction(self, query: YahooFantasySportsQuery):
-        """Parse out trade and other player transactions for all managers.
+    def parse_transactions(self, query: YahooFantasySportsQuery):
+        """Stream trade and other player transactions for all managers.
+
+        Transactions are requested a page at a time (newest first), and each
+        player movement is appended to the season's TransactionLog as soon
+        as its page arrives. Paging stops at the newest transaction ingested
+        by a previous run, so an in-season refresh only fetches new trades,
+        adds and drops.
         """
 
-        return NotImplemented
+        log = TransactionLog(self.season)
+        cursor = log.cursor()
 
-        # for transaction in query.get_league_transactions():
-        #     query_delay()
+        teams = query.get_league_teams()
+
+        managers = {
+            team.team_key: team.managers[0].nickname for team in teams
+            }
+
+        league_key = query.get_league_key()
+
+        newest = cursor
+        start = 0
+
+        while True:
+
+            try:
+                transactions = query.query(
+                    "https://fantasysports.yahooapis.com/fantasy/v2/league/"
+                    f"{league_key}/transactions;types=add,drop,trade;"
+                    f"start={start};count={self.TRANSACTIONS_PAGE_SIZE}",
+                    ["league", "transactions"],
+                    )
+            except YahooFantasySportsDataNotFound:
+                break
+
+            # A single-transaction page is returned as
+            # {"transaction": Transaction}
+            if not isinstance(transactions, list):
+                transactions = [transactions["transaction"]]
+
+            caught_up = False
+
+            for transaction in transactions:
+
+                transaction_id = int(transaction.transaction_id)
+
+                if cursor is not None and transaction_id <= cursor:
+                    caught_up = True
+                    break
 
-        #     if transaction.type == "trade":
-        #         tk0 = int(transaction.tradee_team_key.rsplit('.')[-1])-1
-        #         tk1 = int(transaction.trader_team_key.rsplit('.')[-1])-1
+                if newest is None or transaction_id > newest:
+                    newest = transaction_id
 
-        #         self.transactions_map[season].append((
-        #             teams[tk0].managers[0].nickname,
-        #             teams[tk1].managers[0].nickname,
-        #         ))
+                if transaction.status != "successful":
+                    continue
+
+                players = transaction.players
+                if not isinstance(players, list):
+                    players = [players]
+
+                for player in players:
+
+                    data = player.transaction_data
+                    if isinstance(data, list):
+                        data = data[0]
+
+                    log.write({
+                        "season": self.season,
+                        "transaction_id": transaction_id,
+                        "timestamp": int(transaction.timestamp),
+                        "type": transaction.type,
+                        "action": data.type,
+                        "player_name": player.full_name,
+                        "player_key": player.player_key,
+                        "source": managers.get(
+                            data.source_team_key, data.source_type),
+                        "destination": managers.get(
+                            data.destination_team_key, data.destination_type),
+                        "trader": managers.get(transaction.trader_team_key),
+                        "tradee": managers.get(transaction.tradee_team_key),
+                    })
+
+            if caught_up or len(transactions) < self.TRANSACTIONS_PAGE_SIZE:
+                break
+
+            start += self.TRANSACTIONS_PAGE_SIZE
+
+        if newest is not None:
+            log.save_cursor(newest)
 
     def parse_draft_results(self, query: YahooFantasySportsQuery):
-        """"""
+        """Parse out the draft results (player and cost) for all managers.
+
+        Player names and positions are resolved through the persistent
+        PlayerMetadataCache, so only players never seen before (in any
+        season) are requested, in bulk.
+        """
 
         teams = query.get_league_teams()
-        query_delay()
 
         draft_results_query = query.get_league_draft_results()
 
+        players = self.player_cache.get(
+            query,
+            [drft_rslt.player_key for drft_rslt in draft_results_query],
+            )
+
         for drft_rslt in draft_results_query:
 
             team_k = int(drft_rslt.team_key.split(".")[-1])-1
             manager = teams[team_k].managers[0].nickname
 
-            player = query.get_player_stats_for_season(drft_rslt.player_key)
-            query_delay()
+            player = players[drft_rslt.player_key]
 
             self.draft_results.append(
                 {
                     "season": self.season,
                     "manager": manager,
-                    "player_name": player.full_name,
-                    "player_pos": player.primary_position,
-                    "player_key": player.player_key,
+                    "player_name": player["full_name"],
+                    "player_pos": player["primary_position"],
+                    "player_key": drft_rslt.player_key,
                     "player_cost": drft_rslt.cost,
                 }
             )
@@ -510,60 +736,106 @@ class Query:
             query = self.run_query(self.season)
             self.parse_query(query)
 
-            fn_path = self.CACHE_DIR / f"temp_data_{self.season}.json"
-            with open(fn_path, "w") as f:
-                json.dump(self.managers_record_map[self.season], f)
+    def backfill(self, processes: int = None):
+        """Run and parse YahooFantasySportsQuery for all seasons in parallel.
 
-    def apply_manager_aliases(self, df: pd.DataFrame):
-        """Apply an alias to manager nicknames.
+        Each season in `SEASONS_RANGE` is queried and parsed (including its
+        pandas enrichment) in a separate worker process. The Yahoo request
+        budget is shared across all workers through a SharedTokenBucket.
+        Matchups are checkpointed by the workers themselves, and the other
+        results are merged back in season order, so `save_data` produces the
+        same outputs as after `query_seasons`.
 
-        This method will replace any matched manager nicknames with a desired a
-        lias. The intention is to modify dynamically pulled manager nicknames
-        for consistency, or public distribution.
+        Args:
+            processes (int): Number of worker processes. Defaults to the
+                number of CPUs.
         """
 
-        manager_aliases_path = Path('manager_aliases.json')
+        seasons = list(self.SEASONS_RANGE)
 
-        if not manager_aliases_path.exists:
-            return
+        # Workers can't prompt for the league to query, so resolve it here
+        if self.league_name is None and not self.replay_flag:
+            self.run_query(seasons[-1])
 
-        with open(manager_aliases_path, 'r') as f:
-            manager_aliases = json.load(f)
+        settings = {
+            "league_name": self.league_name,
+            "replay_flag": self.replay_flag,
+            "resume_flag": self.resume_flag,
+            "query_draft_flag": self.query_draft_flag,
+            "query_transactions_flag": self.query_transactions_flag,
+        }
 
-        for manager, alias in manager_aliases.items():
-            df['manager'] = df['manager'].str.replace(manager, alias)
+        limiter = SharedTokenBucket(self.API_RATE_PER_SEC, self.API_BURST)
 
-            if 'opponent' in df.columns:
-                df['opponent'] = df['opponent'].str.replace(manager, alias)
+        with ProcessPoolExecutor(max_workers=processes,
+                                 initializer=_init_backfill_worker,
+                                 initargs=(limiter,)) as pool:
 
-    def save_weekly_matchups_data(self):
-        """Convert the multi-level weekly manager matchups data
-        dictionary into a Pandas dataframe. Then save the dataframe
-        to disk.
+            futures = [
+                pool.submit(_backfill_season, season, settings)
+                for season in seasons
+                ]
+
+            for season, future in tqdm(zip(seasons, futures),
+                                       total=len(seasons),
+                                       desc="Season".ljust(self.TQDM_WIDTH)):
+                result = future.result()
+
+                self.seasons.append(season)
+                self.leagues[season] = result["league"]
+                self.standings_map[season].update(result["standings"])
+                self.draft_results += result["draft_results"]
+
+    def apply_manager_aliases(self, df: pd.DataFrame):
+        """Apply an alias to manager nicknames.
+
+        This method will replace any matched manager nicknames with a desired a
+        lias. The intention is to modify dynamically pulled manager nicknames
+        for consistency, or public distribution. The aliases are read once,
+        into the ManagerDimension, which also records every nickname seen.
         """
-        # Flatten the nested dictionary into a list of records
-        records = []
-        for season in list(self.managers_record_map.keys()):
 
-            for week in list(self.managers_record_map[season].keys()):
+        self.managers.apply(df)
+
+    def save_weekly_matchups_data(self):
+        """Assemble the weekly manager matchups of every parsed season from
+        their checkpoints, and save them to disk.
+
+        Seasons are streamed one at a time into data.csv and
+        matchups.parquet (one row group per season), so only a single
+        season of records is ever held in memory. Each season also replaces
+        its own partition of the league dataset. The latest record of
+        each (week, manager) is kept, including those of weeks still being
+        played.
+        """
 
-                mrm = self.managers_record_map[season][week]
+        with MatchupWriter(self.DATA_DIR) as writer:
 
-                for manager in list(mrm.keys()):
+            for season in self.seasons:
 
-                    manager_stats = mrm[manager]
+                units = Checkpoint(season).load(final_only=False)
 
-                    record = {
+                # Units are logged in completion order, so restore a
+                # deterministic (week, manager) order
+                records = [
+                    {
                         "season": season,
                         "week": week,
                         "manager": manager,
-                        **manager_stats
+                        **record.to_dict()
                     }
-                    records.append(record)
+                    for (week, manager), record in sorted(units.items())
+                    ]
 
-        df = pd.DataFrame(records)
-        self.apply_manager_aliases(df)
-        df.to_csv(self.DATA_DIR / 'data.csv')
+                del units
+
+                df = pd.DataFrame(
+                    records, columns=MatchupWriter.RECORD_COLUMNS,
+                    )
+                self.apply_manager_aliases(df)
+                writer.write(
+                    df, self.leagues.get(season, self.league_name),
+                    )
 
     def save_data(self):
         """Save results from YahooFantasySportsQuery to local files.
@@ -575,32 +847,26 @@ class Query:
 
         self.save_weekly_matchups_data()
 
-        manager_aliases_path = Path('manager_aliases.json')
-        with open(manager_aliases_path, 'r') as f:
-            manager_aliases = json.load(f)
-
-        # Flatten the nested dictionary into a list of records
+        # Collect one record per trade from every season's transaction log
         records = []
-        for season in list(self.managers_record_map.keys()):
+        for log_path in sorted(self.CACHE_DIR.glob("transactions_*.jsonl")):
+
+            season = int(log_path.stem.split("_")[-1])
 
-            print(season)
+            trade_ids = set()
 
-            for trade in self.transactions_map[season]:
+            for transaction in TransactionLog(season).load():
 
-                if trade[0] in manager_aliases:
-                    m0 = manager_aliases[trade[0]]
-                else:
-                    m0 = trade[0]
+                if transaction["type"] != "trade" or \
+                        transaction["transaction_id"] in trade_ids:
+                    continue
 
-                if trade[1] in manager_aliases:
-                    m1 = manager_aliases[trade[1]]
-                else:
-                    m1 = trade[1]
+                trade_ids.add(transaction["transaction_id"])
 
                 record = {
                         "season": season,
-                        "trader": m0,
-                        "tradee": m1,
+                        "trader": self.managers.alias(transaction["trader"]),
+                        "tradee": self.managers.alias(transaction["tradee"]),
                     }
 
                 records.append(record)
@@ -629,17 +895,42 @@ class Query:
         self.apply_manager_aliases(df)
         df.to_csv(self.DATA_DIR / 'standings.csv')
 
+        self.managers.save(self.DATA_DIR / 'managers.csv')
+
+        # Binary snapshot of the tables, memory-mapped by the analyses
+        LeagueStore(self.DATA_DIR).save_snapshot()
+
+        if self.warehouse_flag:
+            Warehouse(self.DATA_DIR / "league.sqlite").build(self.DATA_DIR)
+
     def combine(self, season_range: range = range(2018, 2025+1)):
         """Helper function to combine partial (cached) weekly matchup
         data files into a complete database.
+
+        Seasons cached by earlier versions as temp_data JSON files, with no
+        checkpoint, are first converted into a checkpoint.
         """
 
         for season in season_range:
 
-            with open(self.CACHE_DIR / f"temp_data_{season}.json", "r") as f:
-                data = json.load(f)
+            checkpoint = Checkpoint(season)
+            fn_path = self.CACHE_DIR / f"temp_data_{season}.json"
+
+            if not checkpoint.path.exists() and fn_path.exists():
 
-            self.managers_record_map[season] = data
+                with open(fn_path, "r") as f:
+                    data = json.load(f)
+
+                for week, mrm in data.items():
+                    for manager, record in mrm.items():
+                        checkpoint.append(
+                            int(week),
+                            manager,
+                            record,
+                            final=is_season_closed(season),
+                            )
+
+        self.seasons = list(season_range)
 
         self.save_weekly_matchups_data()
 
@@ -666,43 +957,32 @@ class Query:
         usable database.
         """
 
-        df = pd.read_csv(self.DATA_DIR / 'data.csv')
         df_drft = pd.read_csv(self.DATA_DIR / 'draft_results.csv')
 
-        for k, row in df_drft.iterrows():
-
-            season = row['season']
-            manager = row['manager']
-            player_name = row['player_name']
-            pts = 0.0
-
-            df1 = df[
-                (df['manager'] == manager) &
-                (df['season'] == season)
-            ]
-
-            for week in df1['week'].unique():
-
-                df2 = df1[df1['week'] == week].reset_index()
-                roster = eval(df2.loc[0, 'roster'])
-
-                for r in roster:
-
-                    if r[0] == player_name and r[2] != "BN":
-                        pts += r[3]
-
-            df_drft.loc[k, 'points'] = pts
+        # Season points scored in a starting slot, per manager and player
+        df_pts = read_player_weeks(
+            self.DATA_DIR,
+            columns=["season", "manager", "player", "slot", "points"],
+            )
+        df_pts = df_pts[df_pts["slot"] != "BN"]
+        df_pts = df_pts.groupby(
+            ["season", "manager", "player"], observed=True,
+            )["points"].sum()
+
+        df_drft['points'] = df_pts.reindex(
+            pd.MultiIndex.from_frame(
+                df_drft[['season', 'manager', 'player_name']]
+                ),
+            fill_value=0.0,
+            ).to_numpy()
 
         df_drft = df_drft.drop(
             ['Unnamed: 0', 'player_key'],
             axis=1,
             )
         df_drft.to_csv(self.DATA_DIR / "draft_results.csv")
-        df_drft.to_json(
-            self.ROOT_DIR / '_data' / 'draft-results.json',
-            orient='records',
-            indent=3,
-            )
+        LeagueStore(self.DATA_DIR).save_snapshot()
+        self.web.write("draft-results", df_drft)
 
 
 if __name__ == "__main__":
@@ -714,10 +994,18 @@ if __name__ == "__main__":
     # q.combine_draft()
     # q.save_draft_results()
 
+    # Re-parse from cached API responses, without any network calls
+    # q.replay_flag = True
+
     r = range(2025, 2025+1)
     q.SEASONS_RANGE = r
     q.query_seasons()
 
+    # Backfill all seasons across worker processes
+    # q.SEASONS_RANGE = range(2018, 2025+1)
+    # q.backfill()
+    # q.save_data()
+
     # r = range(2018, 2025+1)
     # q.combine(r)
 
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+
+"""
+ratelimit.py
+
+Shared request budget for the Yahoo Fantasy Sports API.
+
+Every YFPY call made by Query is routed through a single token bucket, so a
+pool of workers can fan out requests without exceeding Yahoo's (unpublished)
+request limits. When Yahoo answers with its throttling status, the bucket
+backs off its refill rate and slowly recovers once requests succeed again.
+
+Usage example:
+
+    limiter = TokenBucket(rate=1.0, capacity=5)
+    query = RateLimitedQuery(YahooFantasySportsQuery(...), limiter)
+    query.get_league_standings()
+"""
+
+import multiprocessing
+import threading
+
+from time import monotonic, sleep
+
+from requests.exceptions import HTTPError
+
+
+def is_throttle_error(err: Exception) -> bool:
+    """Determine if an exception raised by YFPY is Yahoo rate limiting.
+
+    Yahoo signals throttling with a non-standard 999 status code (which YFPY
+    re-raises as an HTTPError), and occasionally with a plain 429.
+    """
+
+    if not isinstance(err, HTTPError):
+        return False
+
+    if err.response is not None and err.response.status_code in (429, 999):
+        return True
+
+    return "rate limit" in str(err).lower()
+
+
+class TokenBucket:
+    """Thread-safe token bucket with additive-increase/multiplicative-decrease
+    rate adaptation.
+
+    Each API request consumes one token. Tokens refill continuously at `rate`
+    tokens per second, up to `capacity` tokens of burst.
+    """
+
+    # Fraction of the current rate kept after a throttling response
+    BACKOFF_FACTOR = 0.5
+
+    # Rate recovered (tokens/sec) after each successful request
+    RECOVERY_STEP = 0.01
+
+    def __init__(self,
+                 rate: float,
+                 capacity: float,
+                 min_rate: float = 0.05,
+                 ):
+        """Initializes a new instance of TokenBucket.
+
+        Args:
+            rate (float): Maximum sustained request rate (tokens per second)
+            capacity (float): Maximum number of tokens available for bursts
+            min_rate (float): Floor the rate never backs off below
+        """
+
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.capacity = capacity
+
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = monotonic()
+
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        """Add the tokens accrued since the last update. Caller holds lock.
+        """
+
+        now = monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated) * self.rate,
+            )
+        self.updated = now
+
+    def acquire(self):
+        """Block until a token is available, then consume it.
+        """
+
+        while True:
+            with self.lock:
+                self._refill()
+
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+
+                wait = (1.0 - self.tokens) / self.rate
+
+            sleep(wait)
+
+    def throttled(self):
+        """Back off after Yahoo reports throttling.
+
+        Cuts the refill rate and drains the bucket so that every worker
+        pauses, instead of immediately spending a saved-up burst.
+        """
+
+        with self.lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * self.BACKOFF_FACTOR)
+            self.tokens = 0.0
+
+    def succeeded(self):
+        """Creep the rate back up towards the maximum after a success.
+        """
+
+        with self.lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.RECOVERY_STEP)
+
+
+class SharedTokenBucket(TokenBucket):
+    """TokenBucket whose state lives in shared memory.
+
+    A single instance can be handed to worker processes (e.g. through a
+    process pool initializer), so that every process draws from the same
+    request budget and observes the same throttling backoff.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 capacity: float,
+                 min_rate: float = 0.05,
+                 ):
+        """Initializes a new instance of SharedTokenBucket.
+
+        Args:
+            rate (float): Maximum sustained request rate (tokens per second)
+            capacity (float): Maximum number of tokens available for bursts
+            min_rate (float): Floor the rate never backs off below
+        """
+
+        # [rate, tokens, updated], guarded by the array's own lock
+        self.state = multiprocessing.Array("d", 3)
+
+        super().__init__(rate, capacity, min_rate)
+
+        self.lock = self.state.get_lock()
+
+    @property
+    def rate(self) -> float:
+        return self.state[0]
+
+    @rate.setter
+    def rate(self, value: float):
+        self.state[0] = value
+
+    @property
+    def tokens(self) -> float:
+        return self.state[1]
+
+    @tokens.setter
+    def tokens(self, value: float):
+        self.state[1] = value
+
+    @property
+    def updated(self) -> float:
+        return self.state[2]
+
+    @updated.setter
+    def updated(self, value: float):
+        self.state[2] = value
+
+
+class RateLimitedQuery:
+    """Proxy around a YahooFantasySportsQuery that routes every method call
+    through a shared TokenBucket.
+
+    Throttled calls are retried with exponential backoff, so callers see the
+    same return values (and non-throttling errors) as the wrapped query.
+    """
+
+    MAX_RETRIES = 5
+    RETRY_DELAY_SEC = 30.0
+
+    def __init__(self, query, limiter: TokenBucket):
+        """Initializes a new instance of RateLimitedQuery.
+
+        Args:
+            query (YahooFantasySportsQuery): The query object to wrap
+            limiter (TokenBucket): Request budget shared by all workers
+        """
+
+        self._query = query
+        self._limiter = limiter
+
+    def __getattr__(self, name: str):
+
+        attr = getattr(self._query, name)
+
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+
+            for attempt in range(self.MAX_RETRIES + 1):
+
+                self._limiter.acquire()
+
+                try:
+                    result = attr(*args, **kwargs)
+
+                except HTTPError as err:
+                    if not is_throttle_error(err) or \
+                            attempt == self.MAX_RETRIES:
+                        raise
+
+                    self._limiter.throttled()
+                    sleep(self.RETRY_DELAY_SEC * 2**attempt)
+                    continue
+
+                self._limiter.succeeded()
+                return result
+
+        return call
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+records.py
+
+Compact in-memory representation of parsed matchup records.
+
+The same player names, team abbreviations, roster slots and weekdays
+repeat across every week of every season. Roster entries keep their
+historical (name, nfl_team, slot, points, position, weekday) tuple form,
+which is what data.csv stores, but their strings are interned so that each
+distinct value is held in memory once. Matchup records are slotted, so they
+carry no per-instance dictionary.
+
+Usage example:
+
+    record = MatchupRecord(is_playoffs, is_consolation, points, ...)
+    record.roster.append(roster_entry(name, team, slot, pts, pos, day))
+    checkpoint.append(week, manager, record.to_dict(), final)
+"""
+
+from dataclasses import dataclass, field
+from sys import intern
+
+
+def _intern(value):
+    return intern(value) if isinstance(value, str) else value
+
+
+def roster_entry(name: str,
+                 nfl_team: str,
+                 slot: str,
+                 points: float,
+                 position: str,
+                 weekday: str,
+                 ) -> tuple:
+    """Roster entry tuple, with interned strings.
+    """
+
+    return (
+        _intern(name),
+        _intern(nfl_team),
+        _intern(slot),
+        points,
+        _intern(position),
+        _intern(weekday),
+        )
+
+
+@dataclass(slots=True)
+class MatchupRecord:
+    """A manager's side of a weekly matchup.
+    """
+
+    is_playoffs: bool
+    is_consolation: bool
+    points: float
+    proj_points: float
+    opp_points: float
+    opp_proj_points: float
+    opponent: str
+    roster: list = field(default_factory=list)
+
+    def __post_init__(self):
+        self.opponent = _intern(self.opponent)
+
+    @classmethod
+    def from_dict(cls, record: dict):
+        """Restore a record written by `to_dict`, e.g. from a checkpoint.
+        """
+
+        return cls(
+            record["is_playoffs"],
+            record["is_consolation"],
+            record["points"],
+            record["proj_points"],
+            record["opp_points"],
+            record["opp_proj_points"],
+            record["opponent"],
+            [roster_entry(*entry) for entry in record["roster"]],
+            )
+
+    def to_dict(self) -> dict:
+        return {
+            "is_playoffs": self.is_playoffs,
+            "is_consolation": self.is_consolation,
+            "points": self.points,
+            "proj_points": self.proj_points,
+            "opp_points": self.opp_points,
+            "opp_proj_points": self.opp_proj_points,
+            "opponent": self.opponent,
+            "roster": self.roster,
+        }
@@ -0,0 +1,237 @@
+"""
+rosters.py
+
+Bulk decoder of the roster column of data.csv.
+
+Every roster is stored in data.csv as the repr of a list of
+(name, nfl_team, slot, points, position, weekday) tuples, or of lists
+when data.csv was combined from the cached JSON weekly data. Rather than
+evaluating each string, the whole column is parsed in a single vectorized
+pass into flat per-player arrays plus per-matchup row offsets. The decoded
+arrays are cached next to the CSV, and reused for as long as the CSV's
+content hash is unchanged.
+
+Usage example:
+
+    rosters = load_rosters(data_dir / "data.csv")
+    for player in rosters.entries(k):
+        name, nfl_team, slot, points, position, weekday = player
+"""
+
+import ast
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from pathlib import Path
+
+
+# A Python string literal, as written by repr()
+_STR = r"""((?:'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|None|nan))"""
+_NUM = r"(-?(?:\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|nan|inf))"
+
+# One roster entry, i.e. (name, nfl_team, slot, points, position, weekday),
+# as a tuple or a list
+ENTRY_PATTERN = (
+    r"[\(\[]\s*" + r",\s*".join([_STR, _STR, _STR, _NUM, _STR, _STR])
+    + r"\s*[\)\]]"
+    )
+
+# Start of a roster entry, i.e. an opening delimiter followed by the name
+ENTRY_START = r"""[\(\[]\s*(?:['"]|None|nan)"""
+
+
+def _unquote(tokens: pd.Series) -> np.ndarray:
+    """Convert string literal tokens back into their values.
+    """
+
+    values = tokens.str.slice(1, -1)
+
+    # Literals that aren't quoted, or contain escapes, are rare enough to
+    # be evaluated one at a time
+    special = ~tokens.str.match(r"""^['"]""") | tokens.str.contains("\\\\")
+
+    if special.any():
+        values = values.astype(object)
+        values[special] = [
+            None if token in ("None", "nan") else ast.literal_eval(token)
+            for token in tokens[special]
+            ]
+
+    return values.to_numpy(dtype=object)
+
+
+class RosterArrays:
+    """Struct-of-arrays view of every roster in data.csv.
+
+    The players of the k-th matchup (k-th row of data.csv) are the
+    elements offsets[k]:offsets[k+1] of each per-player array.
+    """
+
+    FIELDS = ("name", "nfl_team", "slot", "points", "position", "weekday")
+
+    def __init__(self, offsets: np.ndarray, columns: dict):
+        """Initializes a new instance of RosterArrays.
+
+        Args:
+            offsets (np.ndarray): Row offsets, one more than the number of
+                matchups
+            columns (dict): Field name -> per-player np.ndarray
+        """
+
+        self.offsets = offsets
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @classmethod
+    def decode(cls, roster: pd.Series):
+        """Parse a whole column of roster strings in a single pass.
+
+        Args:
+            roster (pd.Series): Roster repr strings, one per matchup
+
+        Returns:
+            RosterArrays: The decoded rosters
+        """
+
+        roster = roster.reset_index(drop=True).astype(str)
+
+        matches = roster.str.extractall(ENTRY_PATTERN)
+
+        expected = roster.str.count(ENTRY_START).sum()
+        if len(matches) != expected:
+            raise RuntimeError(
+                f"Decoded {len(matches)} of {expected} roster entries."
+                )
+
+        counts = np.bincount(
+            matches.index.get_level_values(0),
+            minlength=len(roster),
+            )
+
+        offsets = np.zeros(len(roster) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        columns = {}
+
+        for k, field in enumerate(cls.FIELDS):
+            if field == "points":
+                columns[field] = matches[k].astype(float).to_numpy()
+            else:
+                columns[field] = _unquote(matches[k])
+
+        return cls(offsets, columns)
+
+    def bounds(self, k: int) -> tuple:
+        """Slice bounds of the players of the k-th matchup.
+        """
+
+        return (int(self.offsets[k]), int(self.offsets[k+1]))
+
+    def entries(self, k: int) -> list:
+        """Roster of the k-th matchup, as a list of
+        (name, nfl_team, slot, points, position, weekday) tuples.
+        """
+
+        lo, hi = self.bounds(k)
+
+        return list(zip(*(
+            self.columns[field][lo:hi].tolist() for field in self.FIELDS
+            )))
+
+    def to_frame(self) -> pd.DataFrame:
+        """Every rostered player as one row, with the data.csv row
+        (matchup) the player belongs to as `row`.
+        """
+
+        row = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+        return pd.DataFrame({"row": row, **self.columns})
+
+    def to_table(self, digest: str) -> pa.Table:
+
+        table = pa.Table.from_pandas(self.to_frame(), preserve_index=False)
+
+        return table.replace_schema_metadata({
+            "digest": digest,
+            "num_rows": str(len(self)),
+            })
+
+    @classmethod
+    def from_table(cls, table: pa.Table):
+
+        num_rows = int(table.schema.metadata[b"num_rows"])
+
+        row = table.column("row").to_numpy()
+        offsets = np.searchsorted(row, np.arange(num_rows + 1)).astype(
+            np.int64
+            )
+
+        columns = {
+            field: table.column(field).to_numpy(zero_copy_only=False)
+            for field in cls.FIELDS
+            }
+
+        return cls(offsets, columns)
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 digest of a file's content.
+    """
+
+    sha = hashlib.sha256()
+
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+
+    return sha.hexdigest()
+
+
+def load_rosters(csv_path: Path, roster: pd.Series = None) -> RosterArrays:
+    """Decoded rosters of a data.csv file, cached next to the file.
+
+    The cache (e.g. data.rosters.arrow) records the digest of the CSV it
+    was decoded from, and is rebuilt whenever the CSV changes.
+
+    Args:
+        csv_path (Path): Path of the data.csv file
+        roster (pd.Series): The file's already loaded roster column, to
+            avoid reading the CSV again on a cache miss
+
+    Returns:
+        RosterArrays: The decoded rosters
+    """
+
+    cache_path = csv_path.with_name(f"{csv_path.stem}.rosters.arrow")
+
+    digest = file_digest(csv_path)
+
+    if cache_path.exists():
+
+        with pa.memory_map(str(cache_path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+
+        if table.schema.metadata[b"digest"].decode() == digest:
+            return RosterArrays.from_table(table)
+
+    if roster is None:
+        roster = pd.read_csv(csv_path, usecols=["roster"])["roster"]
+
+    rosters = RosterArrays.decode(roster)
+
+    table = rosters.to_table(digest)
+
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    os.replace(tmp_path, cache_path)
+
+    return rosters
@@ -0,0 +1,293 @@
+"""
+store.py
+
+Shared, memoized access to the league datasets written by Query.
+
+Each dataset is read from disk the first time it is used, and the same
+frame is handed to every later consumer, so a full pipeline run parses
+each source file once.
+
+The CSV files are the export format. Query additionally keeps a snapshot
+of every table as an Arrow IPC file, which the store reads instead of
+parsing the CSV, for as long as the CSV is unchanged. The snapshot is
+memory-mapped, its stamp checked from the file footer alone, and numeric
+columns are handed to pandas without copying. Such columns are read-only,
+so frames loaded from a snapshot can't be modified in place.
+
+Usage example:
+
+    store = LeagueStore()
+    awards = Awards(store)
+    plotting = Plotting(store)
+
+    LeagueStore().save_snapshot()
+"""
+
+import os
+import pandas as pd
+import pyarrow as pa
+
+from functools import cached_property
+from pathlib import Path
+
+from src import derived
+from src.dataset import read_player_weeks
+from src.headtohead import HeadToHead, head_to_head
+from src.matchups import matchup_ids, pair_matchups
+from src.managers import ManagerDimension, categorize, manager_dtype
+from src.rosters import RosterArrays, load_rosters
+
+
+class LeagueStore:
+    """
+    Lazily loaded league datasets, and frames derived from them.
+
+    Frames are shared between consumers, so a consumer that needs to
+    modify one in a way others shouldn't see must work on a copy. Manager
+    columns of every table share one categorical dtype, built from the
+    manager dimension, so a manager has the same code in every table, and
+    masks such as df["manager"] == manager compare integer codes.
+    """
+
+    DATA_DIR = Path(__file__).parent.parent / "data"
+
+    # Snapshotted tables, and the CSV each is exported as
+    TABLES = {
+        "matchups": "data.csv",
+        "standings": "standings.csv",
+        "trades": "transactions.csv",
+        "draft_results": "draft_results.csv",
+    }
+
+    # Snapshotted tables built from another table, and their source
+    DERIVED_TABLES = {
+        "head_to_head": "matchups",
+    }
+
+    def __init__(self, data_dir: Path = None):
+        """
+        Initialize LeagueStore class.
+
+        Args:
+            data_dir (Path): Optional override of the data directory
+        """
+
+        self.data_dir = data_dir or self.DATA_DIR
+
+        self.snapshot_dir = self.data_dir / "snapshot"
+
+        self._seasons = {}
+
+    def source_stamp(self, name: str) -> str:
+        """Identity of a table's CSV, i.e. its modification time and size.
+        Derived tables share the identity of their source.
+        """
+
+        name = self.DERIVED_TABLES.get(name, name)
+
+        stat = os.stat(self.data_dir / self.TABLES[name])
+
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def read_csv(self, name: str) -> pd.DataFrame:
+        """Parse a table from its CSV, including any derived columns.
+        """
+
+        df = pd.read_csv(self.data_dir / self.TABLES[name])
+
+        if name == "matchups":
+            df["point_diff"] = df["points"] - df["proj_points"]
+
+            # data.csv written before the derived columns existed
+            if "opt_points" not in df.columns:
+                rosters = load_rosters(
+                    self.data_dir / self.TABLES[name], df["roster"],
+                    )
+                df_derived = derived.matchup_columns(
+                    rosters.to_frame(), len(df),
+                    )
+                df_derived.index = df.index
+                df = pd.concat([df, df_derived], axis=1)
+
+            if "matchup_id" not in df.columns:
+                df["matchup_id"] = matchup_ids(df)
+
+        self.categorize_managers(name, df)
+
+        return df
+
+    def categorize_managers(self, name: str, df: pd.DataFrame):
+        """Convert a table's manager columns to categoricals over the
+        manager dimension, in place.
+        """
+
+        if name == "trades":
+            columns = ("trader", "tradee")
+        else:
+            columns = ("manager", "opponent")
+
+        categorize(df, columns, self.manager_dtype)
+
+    def build(self, name: str) -> pd.DataFrame:
+        """Build a table from its CSV, or from its source table.
+        """
+
+        if name == "head_to_head":
+            return head_to_head(self.load("matchups"))
+
+        return self.read_csv(name)
+
+    def load(self, name: str) -> pd.DataFrame:
+        """Load a table, from its snapshot if it is up to date with the CSV.
+        """
+
+        path = self.snapshot_dir / f"{name}.arrow"
+
+        if path.exists():
+
+            with pa.memory_map(str(path), "r") as source:
+                reader = pa.ipc.open_file(source)
+
+                if reader.schema.metadata[b"source"].decode() == \
+                        self.source_stamp(name):
+                    table = reader.read_all()
+
+                    # Columns without nulls become views of the mapped file
+                    df = table.to_pandas(
+                        split_blocks=True, self_destruct=True,
+                        )
+
+                    # The dimension may have changed since the snapshot
+                    self.categorize_managers(name, df)
+
+                    return df
+
+        return self.build(name)
+
+    def save_snapshot(self):
+        """Write an Arrow IPC snapshot of every table, from its CSV.
+        """
+
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+
+        for name in [*self.TABLES, *self.DERIVED_TABLES]:
+
+            fn = self.TABLES[self.DERIVED_TABLES.get(name, name)]
+
+            if not (self.data_dir / fn).exists():
+                continue
+
+            stamp = self.source_stamp(name)
+
+            table = pa.Table.from_pandas(
+                self.build(name), preserve_index=False,
+                )
+            table = table.replace_schema_metadata({
+                **table.schema.metadata,
+                b"source": stamp.encode(),
+                })
+
+            path = self.snapshot_dir / f"{name}.arrow"
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+
+            with pa.OSFile(str(tmp_path), "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+            os.replace(tmp_path, path)
+
+    @cached_property
+    def matchups(self) -> pd.DataFrame:
+        """Weekly manager matchups (data.csv), with the difference between
+        actual and projected points as `point_diff`.
+        """
+
+        return self.load("matchups")
+
+    @cached_property
+    def pairs(self) -> pd.DataFrame:
+        """Opponent side of every row of `matchups`, i.e. the opponent's
+        row (`opp_row`, whose roster is rosters.entries(opp_row)) and the
+        opponent's derived columns as opp_<column> (see matchups.py).
+        """
+
+        return pair_matchups(self.matchups, derived.COLUMNS)
+
+    @cached_property
+    def head_to_head(self) -> HeadToHead:
+        """Head-to-head results of every manager pair (see headtohead.py).
+        """
+
+        return HeadToHead(self.load("head_to_head"))
+
+    @cached_property
+    def managers(self) -> pd.DataFrame:
+        """Manager dimension (see managers.ManagerDimension). Empty if
+        managers.csv has not been written yet.
+        """
+
+        path = self.data_dir / "managers.csv"
+
+        if not path.exists():
+            return pd.DataFrame(columns=ManagerDimension.COLUMNS)
+
+        return pd.read_csv(path)
+
+    @cached_property
+    def manager_dtype(self) -> pd.CategoricalDtype:
+        """Categorical dtype of every manager column (see
+        managers.manager_dtype). None if managers.csv has not been written
+        yet, in which case each table's categories are its own managers.
+        """
+
+        if self.managers.empty:
+            return None
+
+        return manager_dtype(self.managers)
+
+    @cached_property
+    def standings(self) -> pd.DataFrame:
+        return self.load("standings")
+
+    @cached_property
+    def trades(self) -> pd.DataFrame:
+        return self.load("trades")
+
+    @cached_property
+    def draft_results(self) -> pd.DataFrame:
+        return self.load("draft_results")
+
+    @cached_property
+    def player_weeks(self) -> pd.DataFrame:
+        """Long-format player-week table (see dataset.read_player_weeks).
+        """
+
+        df = read_player_weeks(self.data_dir)
+
+        categorize(df, ("manager",), self.manager_dtype)
+
+        return df
+
+    @cached_property
+    def rosters(self) -> RosterArrays:
+        """Decoded roster of every matchup, aligned with the rows of
+        `matchups` (see rosters.load_rosters).
+        """
+
+        return load_rosters(
+            self.data_dir / "data.csv",
+            self.matchups["roster"],
+            )
+
+    def season(self, season: int) -> pd.DataFrame:
+        """Weekly manager matchups of a single season.
+
+        Args:
+            season (int): The NFL season (year)
+        """
+
+        if season not in self._seasons:
+            df = self.matchups
+            self._seasons[season] = df[df["season"] == season]
+
+        return self._seasons[season]
@@ -0,0 +1,232 @@
+"""
+warehouse.py
+
+Indexed SQLite copy of the league datasets.
+
+The warehouse holds the weekly matchups, standings, rostered players and
+draft results in tables indexed for the narrow lookups the analyses make,
+e.g. one season-week, one manager versus one opponent, or one player. Those
+lookups are then index seeks, without loading all of history into memory.
+
+Usage example:
+
+    warehouse = Warehouse()
+    warehouse.build(data_dir)
+    df = warehouse.player("Joe Flacco")
+"""
+
+import pandas as pd
+import pyarrow.parquet as pq
+import sqlite3
+
+from contextlib import closing
+from pathlib import Path
+
+
+class Warehouse:
+    """
+    SQLite warehouse of league history, built from the files written by
+    Query.save_data.
+
+    """
+
+    PATH = Path(__file__).parent.parent / "data" / "league.sqlite"
+
+    SCHEMA = """
+        CREATE TABLE matchups (
+            season INTEGER NOT NULL,
+            week INTEGER NOT NULL,
+            manager TEXT NOT NULL,
+            is_playoffs INTEGER,
+            is_consolation INTEGER,
+            points REAL,
+            proj_points REAL,
+            opp_points REAL,
+            opp_proj_points REAL,
+            opponent TEXT,
+            matchup_id INTEGER
+        );
+        CREATE TABLE roster_players (
+            season INTEGER NOT NULL,
+            week INTEGER NOT NULL,
+            manager TEXT NOT NULL,
+            player TEXT,
+            nfl_team TEXT,
+            slot TEXT,
+            points REAL,
+            position TEXT,
+            weekday TEXT
+        );
+        CREATE TABLE standings (
+            season INTEGER NOT NULL,
+            manager TEXT NOT NULL,
+            pf REAL,
+            pa REAL,
+            rank INTEGER,
+            seed INTEGER,
+            wins INTEGER,
+            losses INTEGER
+        );
+        CREATE TABLE draft_results (
+            season INTEGER NOT NULL,
+            manager TEXT NOT NULL,
+            player_name TEXT,
+            player_pos TEXT,
+            player_cost REAL,
+            points REAL
+        );
+
+        CREATE INDEX matchups_week ON matchups (season, week, manager);
+        CREATE INDEX matchups_opponent ON matchups (manager, opponent);
+        CREATE INDEX matchups_id ON matchups (matchup_id);
+        CREATE INDEX roster_players_week
+            ON roster_players (season, week, manager);
+        CREATE INDEX roster_players_player ON roster_players (player);
+        CREATE INDEX standings_season ON standings (season, manager);
+        CREATE INDEX draft_results_season ON draft_results (season, manager);
+        CREATE INDEX draft_results_player ON draft_results (player_name);
+    """
+
+    TABLES = ("matchups", "roster_players", "standings", "draft_results")
+
+    def __init__(self, path: Path = None):
+        """
+        Initialize Warehouse class.
+
+        Args:
+            path (Path): Optional override of the database location
+        """
+
+        self.path = path or self.PATH
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode, with transactions managed
+        explicitly.
+        """
+
+        return sqlite3.connect(self.path, isolation_level=None)
+
+    def build(self, data_dir: Path):
+        """(Re)create the warehouse from the files in the data directory.
+
+        Rostered players are streamed in one Parquet batch at a time. The
+        tables are replaced in a single transaction, so readers never see a
+        partially built warehouse.
+
+        Args:
+            data_dir (Path): Directory containing data.csv, standings.csv,
+                player_weeks.parquet and (optionally) draft_results.csv
+        """
+
+        with closing(self.connect()) as con:
+
+            con.execute("BEGIN")
+
+            try:
+                self.populate(con, data_dir)
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+
+            con.execute("COMMIT")
+
+    def populate(self, con: sqlite3.Connection, data_dir: Path):
+        """Recreate and fill every table. Caller manages the transaction.
+        """
+
+        for table in self.TABLES:
+            con.execute(f"DROP TABLE IF EXISTS {table}")
+
+        # executescript() would commit the open transaction
+        for statement in self.SCHEMA.split(";"):
+            if statement.strip():
+                con.execute(statement)
+
+        columns = [
+            "season", "week", "manager", "is_playoffs", "is_consolation",
+            "points", "proj_points", "opp_points", "opp_proj_points",
+            "opponent", "matchup_id",
+            ]
+        for df in pd.read_csv(data_dir / "data.csv",
+                              usecols=columns,
+                              chunksize=10000):
+            self.insert(con, "matchups", df)
+
+        players = pq.ParquetFile(data_dir / "player_weeks.parquet")
+        for batch in players.iter_batches():
+            self.insert(con, "roster_players", batch.to_pandas())
+
+        self.insert(
+            con, "standings", pd.read_csv(data_dir / "standings.csv"),
+            )
+
+        draft_results_path = data_dir / "draft_results.csv"
+        if draft_results_path.exists():
+            self.insert(
+                con, "draft_results", pd.read_csv(draft_results_path),
+                )
+
+    def insert(self, con: sqlite3.Connection, table: str, df: pd.DataFrame):
+        """Append the rows of a frame to a table, keeping only the columns
+        the table defines.
+        """
+
+        columns = [
+            row[1] for row in con.execute(f"PRAGMA table_info({table})")
+            ]
+        df = df[[column for column in columns if column in df.columns]]
+
+        placeholders = ", ".join("?" * len(df.columns))
+
+        con.executemany(
+            f"INSERT INTO {table} ({', '.join(df.columns)}) "
+            f"VALUES ({placeholders})",
+            df.astype(object).where(df.notna(), None).itertuples(
+                index=False, name=None,
+                ),
+            )
+
+    def query(self, sql: str, params: tuple = ()) -> pd.DataFrame:
+        """Run a query against the warehouse.
+        """
+
+        with closing(self.connect()) as con:
+            return pd.read_sql_query(sql, con, params=params)
+
+    def matchups(self,
+                 season: int = None,
+                 week: int = None,
+                 manager: str = None,
+                 opponent: str = None,
+                 ) -> pd.DataFrame:
+        """Weekly matchups, filtered on any of season, week, manager and
+        opponent.
+        """
+
+        filters = {
+            "season": season,
+            "week": week,
+            "manager": manager,
+            "opponent": opponent,
+        }
+
+        where = [f"{key} = ?" for key, value in filters.items()
+                 if value is not None]
+        params = tuple(value for value in filters.values()
+                       if value is not None)
+
+        sql = "SELECT * FROM matchups"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+
+        return self.query(sql, params)
+
+    def player(self, player: str) -> pd.DataFrame:
+        """Every week a player was rostered, by any manager.
+        """
+
+        return self.query(
+            "SELECT * FROM roster_players WHERE player = ? "
+            "ORDER BY season, week",
+            (player,),
+            )
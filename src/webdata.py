@@ -0,0 +1,144 @@
+"""
+webdata.py
+
+Serialization of the JSON data files consumed by the Jekyll site.
+
+Every _data output goes through WebData, which controls how the files are
+encoded. Besides the _data file read by Jekyll, outputs can be published as
+static assets for the browser to fetch, with pre-compressed gzip (and,
+when the brotli package is installed, brotli) siblings, and split into one
+file per season so that pages only download the seasons they show.
+
+Usage example:
+
+    web = WebData(compact=True, publish=True, shard=True)
+    web.write("draft-results", df_drft)
+"""
+
+import gzip
+import json
+import os
+import pandas as pd
+
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class WebData:
+    """
+    Writer of _data JSON outputs.
+
+    """
+
+    ROOT_DIR = Path(__file__).parent.parent
+    WEB_DATA_DIR = ROOT_DIR / "_data"
+    PUBLISH_DIR = ROOT_DIR / "assets" / "data"
+
+    # Indentation of the human-readable encoding
+    INDENT = 3
+
+    def __init__(self,
+                 compact: bool = False,
+                 publish: bool = False,
+                 shard: bool = False,
+                 web_data_dir: Path = None,
+                 publish_dir: Path = None,
+                 ):
+        """
+        Initialize WebData class.
+
+        Args:
+            compact (bool): Encode without indentation or whitespace
+            publish (bool): Also write outputs, with gzip/brotli compressed
+                siblings, to the published assets directory
+            shard (bool): Also publish outputs of season records as one
+                file per season
+            web_data_dir (Path): Optional override of the _data directory
+            publish_dir (Path): Optional override of the assets directory
+        """
+
+        self.compact = compact
+        self.publish = publish
+        self.shard = shard
+
+        self.web_data_dir = web_data_dir or self.WEB_DATA_DIR
+        self.publish_dir = publish_dir or self.PUBLISH_DIR
+
+    def encode(self, data) -> bytes:
+
+        if self.compact:
+            text = json.dumps(data, separators=(",", ":"))
+        else:
+            text = json.dumps(data, indent=self.INDENT)
+
+        return text.encode()
+
+    def write(self, name: str, data, season_key: str = "season"):
+        """Write a _data output.
+
+        Args:
+            name (str): Output name, i.e. _data/<name>.json
+            data: JSON-serializable data, or a DataFrame (written as a list
+                of records)
+            season_key (str): Field of the records to shard by
+        """
+
+        if isinstance(data, pd.DataFrame):
+            data = json.loads(data.to_json(orient="records"))
+
+        payload = self.encode(data)
+
+        self.save(self.web_data_dir / f"{name}.json", payload)
+
+        if not self.publish:
+            return
+
+        self.save_compressed(self.publish_dir / f"{name}.json", payload)
+
+        if self.shard and isinstance(data, list) and data and all(
+                isinstance(record, dict) and season_key in record
+                for record in data):
+
+            shards = {}
+            for record in data:
+                shards.setdefault(record[season_key], []).append(record)
+
+            for season, records in shards.items():
+                self.save_compressed(
+                    self.publish_dir / name / f"{season}.json",
+                    self.encode(records),
+                    )
+
+    def save(self, path: Path, payload: bytes):
+        """Atomically write a file.
+        """
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+
+        os.replace(tmp_path, path)
+
+    def save_compressed(self, path: Path, payload: bytes):
+        """Write a file along with its pre-compressed siblings.
+        """
+
+        self.save(path, payload)
+
+        # mtime=0 keeps the output identical when the data is unchanged
+        self.save(
+            path.with_name(path.name + ".gz"),
+            gzip.compress(payload, compresslevel=9, mtime=0),
+            )
+
+        if brotli is not None:
+            self.save(
+                path.with_name(path.name + ".br"),
+                brotli.compress(payload),
+                )